@@ -1,11 +1,16 @@
 """
 ASGI config for ChemEquip Visualizer Backend.
+Serve with an ASGI server (e.g. `uvicorn config.asgi:application`) so the
+async /api/datasets/ endpoints run on the event loop.
 """
 
 import os
 
 from django.core.asgi import get_asgi_application
 
+from equipment.database import serve_requests
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+serve_requests()
 application = get_asgi_application()
@@ -36,6 +36,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'equipment.instrumentation.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -72,10 +73,24 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': dj_database_url.config(
         default=f"sqlite:///{BASE_DIR / 'db.sqlite3'}",
-        conn_max_age=600
+        conn_max_age=int(os.getenv('DB_CONN_MAX_AGE', '600')),
+        conn_health_checks=True
     )
 }
 
+# Postgres connection pooling: persistent connections (DB_CONN_MAX_AGE) are
+# reused per worker; with DB_POOLER=pgbouncer, connections go through a
+# transaction-mode PgBouncer, which cannot hold server-side cursors open.
+if os.getenv('DB_POOLER', '').lower() == 'pgbouncer':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# SQLite tuning for concurrent writers (applied per connection, see equipment/database.py;
+# the journal mode only by the WSGI/ASGI server processes)
+EQUIPMENT_SQLITE = {
+    'JOURNAL_MODE': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+    'BUSY_TIMEOUT_MS': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '20000')),
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -139,6 +154,32 @@ CORS_ALLOWED_ORIGIN_REGEXES = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Dataset History Retention (0 disables a rule; the newest upload is always kept)
+EQUIPMENT_RETENTION = {
+    'MAX_COUNT': int(os.getenv('RETENTION_MAX_COUNT', '5')),
+    'MAX_AGE_DAYS': int(os.getenv('RETENTION_MAX_AGE_DAYS', '0')),
+    'MAX_TOTAL_BYTES': int(os.getenv('RETENTION_MAX_TOTAL_BYTES', '0')),
+}
+
+# Anomaly scoring at ingest: per-type robust z-score (median/MAD) and IQR fences
+EQUIPMENT_ANOMALY = {
+    'ENABLED': os.getenv('ANOMALY_DETECTION', 'True').lower() in ('true', '1', 't'),
+    'Z_THRESHOLD': float(os.getenv('ANOMALY_Z_THRESHOLD', '3.5')),
+    'IQR_K': float(os.getenv('ANOMALY_IQR_K', '1.5')),
+}
+
+# Instrumentation: per-request profiling via ?profile=1 or ?profile=pyinstrument,
+# honoured for staff users only
+EQUIPMENT_PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() in ('true', '1', 't')
+
+# Seconds a dataset's dashboard summary stays cached. Writes update the cache
+# of the process that made them; with a per-process cache other workers may
+# serve the previous summary for up to this long.
+EQUIPMENT_DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '300'))
+
+# Worker threads for CPU-bound work offloaded by async views
+EQUIPMENT_CPU_WORKERS = int(os.getenv('CPU_WORKERS', str(min(8, os.cpu_count() or 2))))
+
 # File Upload Settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760  # 10MB
@@ -6,7 +6,10 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from equipment.database import serve_requests
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
+serve_requests()
 application = get_wsgi_application()
 app = application
@@ -7,21 +7,26 @@ from .models import Dataset
 
 @admin.register(Dataset)
 class DatasetAdmin(admin.ModelAdmin):
-    list_display = ('filename', 'uploaded_at', 'total_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature')
+    list_display = ('filename', 'uploaded_at', 'total_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'payload_size')
     list_filter = ('uploaded_at',)
-    search_fields = ('filename', 'id')
-    readonly_fields = ('id', 'uploaded_at')
+    search_fields = ('filename', 'id', '=content_hash')
+    readonly_fields = ('id', 'uploaded_at', 'content_hash', 'payload_size', 'raw_size', 'data')
     ordering = ('-uploaded_at',)
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # The change list never shows the raw data; the change form loads it on access
+        return qs.defer(*Dataset.LIST_DEFERRED_FIELDS)
     
     fieldsets = (
         ('Dataset Information', {
-            'fields': ('id', 'filename', 'uploaded_at')
+            'fields': ('id', 'filename', 'uploaded_at', 'content_hash')
         }),
         ('Summary Statistics', {
             'fields': ('total_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature', 'type_distribution')
         }),
         ('Raw Data', {
-            'fields': ('data',),
+            'fields': ('payload_size', 'raw_size', 'data'),
             'classes': ('collapse',)
         }),
     )
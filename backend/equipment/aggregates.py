@@ -0,0 +1,88 @@
+"""
+Equipment App - Running Aggregates
+Summary statistics kept as running sums, counts and quantile sketches, so a
+row delta updates them in time proportional to the delta rather than the
+whole dataset.
+"""
+import math
+
+import numpy as np
+
+from .sketches import QuantileSketch
+
+NUMERIC_FIELDS = ('flowrate', 'pressure', 'temperature')
+PERCENTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def build_running_stats(columns):
+    """
+    Running stats for a full set of columns ({field: sequence}).
+    """
+    sums = {}
+    sketches = {}
+    for field in NUMERIC_FIELDS:
+        values = np.asarray(columns[field], dtype='float64')
+        sketch = QuantileSketch()
+        sketch.add(values)
+        sums[field] = float(np.nansum(values))
+        sketches[field] = sketch.to_dict()
+    return {'sums': sums, 'sketches': sketches, 'anomalies': _anomaly_count(columns)}
+
+
+def _anomaly_count(columns):
+    if 'anomaly_flags' not in columns:
+        return 0
+    return int(np.count_nonzero(np.asarray(columns['anomaly_flags'])))
+
+
+def apply_delta(dataset, added, removed):
+    """
+    Fold a row delta into a dataset's stored summary in place.
+
+    `added` and `removed` are dicts of column arrays (ROW_FIELDS, plus
+    anomaly_flags when scored) for the rows entering and leaving the
+    dataset; an updated row appears in both.
+    """
+    stats = dataset.running_stats or {}
+    sums = dict(stats.get('sums', {}))
+    sketches = dict(stats.get('sketches', {}))
+
+    count = dataset.total_count + len(added['type']) - len(removed['type'])
+    for field in NUMERIC_FIELDS:
+        new_values = np.asarray(added[field], dtype='float64')
+        old_values = np.asarray(removed[field], dtype='float64')
+        sums[field] = sums.get(field, 0.0) + float(np.nansum(new_values)) - float(np.nansum(old_values))
+        sketch = QuantileSketch.from_dict(sketches.get(field, {}))
+        sketch.remove(old_values)
+        sketch.add(new_values)
+        sketches[field] = sketch.to_dict()
+
+    distribution = dict(dataset.type_distribution or {})
+    for eq_type in removed['type']:
+        distribution[eq_type] = distribution.get(eq_type, 0) - 1
+    for eq_type in added['type']:
+        distribution[eq_type] = distribution.get(eq_type, 0) + 1
+
+    dataset.total_count = count
+    dataset.avg_flowrate = sums['flowrate'] / count if count else 0.0
+    dataset.avg_pressure = sums['pressure'] / count if count else 0.0
+    dataset.avg_temperature = sums['temperature'] / count if count else 0.0
+    dataset.type_distribution = {k: v for k, v in distribution.items() if v > 0}
+    anomalies = stats.get('anomalies', 0) + _anomaly_count(added) - _anomaly_count(removed)
+    dataset.running_stats = {'sums': sums, 'sketches': sketches, 'anomalies': max(anomalies, 0)}
+
+
+def percentiles(running_stats):
+    """
+    Approximate percentiles per numeric field from the stored sketches.
+    """
+    sketches = (running_stats or {}).get('sketches', {})
+    result = {}
+    for field in NUMERIC_FIELDS:
+        if field not in sketches:
+            continue
+        sketch = QuantileSketch.from_dict(sketches[field])
+        values = {name: sketch.quantile(q) for name, q in PERCENTILES.items()}
+        result[field] = {name: (round(v, 6) if v is not None and math.isfinite(v) else None)
+                         for name, v in values.items()}
+    return result
@@ -0,0 +1,163 @@
+"""
+Equipment App - Anomaly Detection
+Per-type outlier scoring over the numeric columns: a robust z-score from the
+median and MAD, and Tukey IQR fences. Runs as one linear pass over rows
+bucketed by type and keeps the per-type baseline, so later rows can be
+scored against it without revisiting the dataset.
+"""
+from itertools import compress
+
+import numpy as np
+import pandas as pd
+
+from .validation import NUMERIC_COLUMNS
+
+Z_THRESHOLD = 3.5
+IQR_K = 1.5
+
+# Consistency constants: scale MAD / mean absolute deviation to a std dev
+_MAD_SCALE = 1.4826
+_MEAN_AD_SCALE = 1.2533
+
+# Bit per (column, test) in the per-row flags
+ANOMALY_BITS = {}
+for _i, _column in enumerate(NUMERIC_COLUMNS):
+    ANOMALY_BITS[(_column, 'z')] = 1 << (2 * _i)
+    ANOMALY_BITS[(_column, 'iqr')] = 1 << (2 * _i + 1)
+
+
+class AnomalyResult:
+    """
+    Per-row `flags` (bitmask, see ANOMALY_BITS) and `scores` (largest
+    |robust z| over the columns for flagged rows, 0 otherwise), plus the
+    per-type `baseline` {type: {column: [median, scale, low fence, high fence]}}.
+    """
+
+    def __init__(self, scores, flags, baseline):
+        self.scores = scores
+        self.flags = flags
+        self.baseline = baseline
+
+    @property
+    def count(self):
+        return int(np.count_nonzero(self.flags))
+
+
+def _score_column(values, median, scale, low, high, z_threshold, column):
+    """
+    |robust z| and flag bits for one column; the baseline parameters are
+    scalars for a single type's block or per-row arrays.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.abs(values - median) / scale
+    z = np.nan_to_num(z, nan=0.0, posinf=0.0, neginf=0.0)
+    flags = np.where(z > z_threshold, ANOMALY_BITS[(column, 'z')], 0)
+    flags |= np.where((values < low) | (values > high), ANOMALY_BITS[(column, 'iqr')], 0)
+    return z, flags
+
+
+def _finish(scores, flags):
+    # Only flagged rows keep a score: a column of zeros costs next to
+    # nothing to store and serialize, a dense float column does not
+    return np.round(np.where(flags != 0, scores, 0.0), 3), flags
+
+
+def detect_anomalies(frame, z_threshold=Z_THRESHOLD, iqr_k=IQR_K):
+    """
+    Score a validated DataFrame (canonical columns) against its own
+    per-type distribution. Returns an AnomalyResult.
+
+    Rows are bucketed by type with a counting sort, then each type's
+    quartiles, median and MAD come from np.quantile/np.median, which use
+    selection rather than sorting, so the pass is linear in the row count.
+    Rows are scored block by block in bucketed order and scattered back.
+    """
+    codes, types = pd.factorize(frame['Type'], sort=False)
+    values = frame[NUMERIC_COLUMNS].to_numpy(dtype='float64')
+    group_count = len(types)
+
+    # Stable sort on small integer codes is a radix sort in numpy
+    sort_codes = codes.astype('int16') if group_count < 2 ** 15 else codes
+    order = np.argsort(sort_codes, kind='stable')
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=group_count))])
+
+    sorted_scores = np.zeros(len(frame))
+    sorted_flags = np.zeros(len(frame), dtype='int64')
+    baseline = {str(eq_type): {} for eq_type in types}
+    for i, column in enumerate(NUMERIC_COLUMNS):
+        column_values = values[order, i]
+        for k, eq_type in enumerate(types):
+            lo, hi = bounds[k], bounds[k + 1]
+            block = column_values[lo:hi]
+            q1, median, q3 = np.quantile(block, [0.25, 0.5, 0.75])
+            deviation = np.abs(block - median)
+            scale = np.median(deviation) * _MAD_SCALE
+            if not scale > 0:
+                # MAD is 0 when over half a group shares one value; fall back to the mean deviation
+                scale = deviation.mean() * _MEAN_AD_SCALE
+            low, high = q1 - iqr_k * (q3 - q1), q3 + iqr_k * (q3 - q1)
+            z, flags = _score_column(block, median, scale, low, high, z_threshold, column)
+            np.maximum(sorted_scores[lo:hi], z, out=sorted_scores[lo:hi])
+            sorted_flags[lo:hi] |= flags
+            baseline[str(eq_type)][column] = [float(median), float(scale), float(low), float(high)]
+
+    scores = np.empty_like(sorted_scores)
+    flags = np.empty_like(sorted_flags)
+    scores[order] = sorted_scores
+    flags[order] = sorted_flags
+    return AnomalyResult(*_finish(scores, flags), baseline)
+
+
+def score_against(frame, baseline, z_threshold=Z_THRESHOLD):
+    """
+    Score rows against a stored baseline, e.g. rows upserted after ingest.
+    Types without a baseline are not flagged.
+    """
+    values = frame[NUMERIC_COLUMNS].to_numpy(dtype='float64')
+    params = np.full((4, len(frame), len(NUMERIC_COLUMNS)), np.nan)
+    for eq_type, rows in pd.Series(np.arange(len(frame))).groupby(frame['Type'].to_numpy()):
+        stats = baseline.get(str(eq_type))
+        if stats:
+            params[:, rows.to_numpy(), :] = np.array([stats[c] for c in NUMERIC_COLUMNS]).T[:, None, :]
+    scores = np.zeros(len(frame))
+    flags = np.zeros(len(frame), dtype='int64')
+    for i, column in enumerate(NUMERIC_COLUMNS):
+        z, column_flags = _score_column(values[:, i], *params[:, :, i], z_threshold, column)
+        np.maximum(scores, z, out=scores)
+        flags |= column_flags
+    return AnomalyResult(*_finish(scores, flags), baseline)
+
+
+def flagged_columns(flags):
+    """
+    Column names flagged by either test in a single row's flags.
+    """
+    return [column for column in NUMERIC_COLUMNS
+            if flags & (ANOMALY_BITS[(column, 'z')] | ANOMALY_BITS[(column, 'iqr')])]
+
+
+def anomaly_rows(columns):
+    """
+    Flagged rows of stored columns ({field: list}, snake_case) as a sparse
+    list for highlighting: row index, name, score, flags and flagged fields.
+    Empty when the columns were stored without scoring.
+    """
+    flags = columns.get('anomaly_flags')
+    if flags is None:
+        return []
+    names = columns['equipment_name']
+    scores = columns['anomaly_score']
+    fields = {}
+    rows = []
+    for i in compress(range(len(flags)), flags):
+        flag = flags[i]
+        if flag not in fields:
+            fields[flag] = [column.lower() for column in flagged_columns(flag)]
+        rows.append({
+            "index": i,
+            "equipment_name": names[i],
+            "anomaly_score": scores[i],
+            "anomaly_flags": flag,
+            "fields": fields[flag],
+        })
+    return rows
@@ -8,3 +8,8 @@ class EquipmentConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'equipment'
     verbose_name = 'Equipment Management'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .database import configure_sqlite
+        connection_created.connect(configure_sqlite, dispatch_uid='equipment_configure_sqlite')
@@ -0,0 +1,293 @@
+"""
+Equipment App - Async API Views
+Async-native variants of the read-heavy endpoints for ASGI deployments.
+DB access uses Django's async ORM, responses are streamed from async
+iterators, and CPU-heavy work runs in the bounded executor. Row upserts
+run their transaction in a worker thread.
+"""
+import base64
+import functools
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import authenticate
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+
+from .aggregates import percentiles
+from .deltas import frame_from_records, upsert_rows
+from .executor import run_cpu
+from .exports import iter_row_indexes, parse_anomaly_filters
+from .instrumentation import span, record_bytes, record_rows
+from .models import Dataset
+from .reports import build_dataset_report
+from .storage import row_fields
+from .validation import SchemaError, check_result, read_equipment_table, resolve_columns, validate_frame
+from .views import parse_history_params, serialize_dataset
+
+logger = logging.getLogger(__name__)
+
+ROW_CHUNK_SIZE = 1000
+PDF_CHUNK_SIZE = 64 * 1024
+
+
+async def _authenticate(request):
+    """
+    HTTP Basic authentication through the configured AUTHENTICATION_BACKENDS,
+    as DRF's BasicAuthentication does for the sync views. The backends query
+    the user table and hash the password, so they run in Django's sync
+    thread rather than on the event loop.
+    """
+    header = request.headers.get('Authorization', '')
+    if not header.lower().startswith('basic '):
+        return None
+    try:
+        username, _, password = base64.b64decode(header[6:]).decode('utf-8').partition(':')
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+    user = await sync_to_async(authenticate)(request, username=username, password=password)
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def async_basic_auth(view):
+    """
+    Require HTTP Basic credentials on an async view.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await _authenticate(request)
+        if user is None:
+            response = JsonResponse({"error": "Authentication credentials were not provided."}, status=401)
+            response['WWW-Authenticate'] = 'Basic realm="api"'
+            return response
+        request.user = user
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _dumps(value):
+    return json.dumps(value, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+@async_basic_auth
+async def async_history(request):
+    """
+    GET /api/datasets/
+    Same payload as /api/history/, streamed one dataset at a time.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    include_data, limit = parse_history_params(request.GET)
+    datasets = Dataset.objects.all()
+    if not include_data:
+        datasets = datasets.defer('payload')
+    datasets = datasets[:limit]
+
+    async def stream():
+        yield b'['
+        first = True
+        async for dataset in datasets:
+            if include_data:
+                await dataset.aprefetch_overlay()
+                # Decompressing and encoding rows is CPU work
+                chunk = await run_cpu(lambda d=dataset: _dumps(serialize_dataset(d, True)))
+            else:
+                chunk = _dumps(serialize_dataset(dataset, False))
+            yield chunk if first else b',' + chunk
+            first = False
+        yield b']'
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
+
+
+def _read_delta(request):
+    """
+    Parse and validate the rows of an upsert request: either a multipart
+    'file' (CSV/XLSX/XLS) or a JSON body {"rows": [{...}, ...]}.
+    """
+    file = request.FILES.get('file')
+    with span('parse'):
+        if file is not None:
+            if not file.name.lower().endswith(('.csv', '.xlsx', '.xls')):
+                raise ValueError("Unsupported file format. Use CSV, XLSX, or XLS.")
+            record_bytes(file.size, direction='in')
+            raw, mapping, header_units = read_equipment_table(file, file.name)
+        else:
+            try:
+                body = json.loads(request.body or b'{}')
+            except ValueError:
+                raise ValueError("Request body must be JSON or a multipart file upload")
+            records = body.get('rows') if isinstance(body, dict) else body
+            raw = frame_from_records(records)
+            mapping, header_units, missing = resolve_columns(raw.columns)
+            if missing:
+                raise SchemaError(f"Missing row fields: {', '.join(missing)}", {"missing_columns": missing})
+    with span('validate'):
+        return check_result(validate_frame(raw, mapping, header_units))
+
+
+def _upsert(request, dataset_id):
+    try:
+        validation = _read_delta(request)
+        dataset, inserted, updated = upsert_rows(dataset_id, validation.data)
+    except SchemaError as e:
+        return JsonResponse({"error": str(e), "validation": e.report}, status=422)
+    except Dataset.DoesNotExist:
+        return JsonResponse({"error": "Dataset not found"}, status=404)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        logger.exception("Row upsert failed for %s", dataset_id)
+        return JsonResponse({"error": f"Upsert failed: {str(e)}"}, status=500)
+
+    record_rows(inserted + updated)
+    return JsonResponse({
+        "id": dataset.id,
+        "revision": dataset.revision,
+        "inserted": inserted,
+        "updated": updated,
+        "summary": {
+            "total_count": dataset.total_count,
+            "avg_flowrate": dataset.avg_flowrate,
+            "avg_pressure": dataset.avg_pressure,
+            "avg_temperature": dataset.avg_temperature,
+            "type_distribution": dataset.type_distribution,
+            "percentiles": percentiles(dataset.running_stats),
+            "anomaly_count": dataset.running_stats.get('anomalies', 0),
+        },
+        "validation": validation.report,
+    })
+
+
+@async_basic_auth
+async def async_dataset_rows(request, dataset_id):
+    """
+    GET /api/datasets/<id>/rows/?offset=0&limit=N
+    Stream a dataset's rows as a JSON array, with anomaly_score and
+    anomaly_flags when the dataset was scored. anomalous=true and
+    min_anomaly_score=<number> filter rows before offset/limit apply.
+
+    POST /api/datasets/<id>/rows/
+    Upsert rows by equipment name from a JSON body {"rows": [...]} or a
+    multipart 'file'. Only the delta is parsed and the summary is updated
+    incrementally.
+    """
+    if request.method == 'POST':
+        return await sync_to_async(_upsert)(request, dataset_id)
+    if request.method != 'GET':
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+        limit = int(request.GET['limit']) if 'limit' in request.GET else None
+    except ValueError:
+        return JsonResponse({"error": "offset and limit must be integers"}, status=400)
+    try:
+        filters = parse_anomaly_filters(request.GET)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        with span('db_read'):
+            dataset = await Dataset.objects.only('id', 'payload', 'overlay_rows').aget(id=dataset_id)
+    except Dataset.DoesNotExist:
+        return JsonResponse({"error": "Dataset not found"}, status=404)
+    await dataset.aprefetch_overlay()
+
+    def load_columns():
+        with span('decode'):
+            columns = dataset.columns()
+        # The count goes in a header, so it is taken before streaming starts
+        total = sum(len(indexes) for indexes in _row_index_chunks(columns, filters, offset, limit))
+        return columns, total
+
+    columns, total = await run_cpu(load_columns)
+
+    def encode_chunks():
+        fields = row_fields(columns)
+        first = True
+        for indexes in _row_index_chunks(columns, filters, offset, limit):
+            body = _dumps([{field: columns[field][i] for field in fields} for i in indexes])[1:-1]
+            yield body if first else b',' + body
+            first = False
+
+    async def stream():
+        # Row dicts are built and encoded one chunk at a time in the executor
+        chunks = encode_chunks()
+        yield b'['
+        while True:
+            chunk = await run_cpu(next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+        yield b']'
+
+    response = StreamingHttpResponse(stream(), content_type='application/json')
+    response['X-Total-Rows'] = str(total)
+    return response
+
+
+def _row_index_chunks(columns, filters, offset, limit):
+    """
+    Row indexes to return, in chunks of at most ROW_CHUNK_SIZE, after the
+    anomaly filters and then offset/limit.
+    """
+    total = len(columns['equipment_name'])
+    remaining = None if limit is None else max(0, limit)
+    if not filters:
+        stop = total if remaining is None else min(total, offset + remaining)
+        for start in range(offset, stop, ROW_CHUNK_SIZE):
+            yield range(start, min(start + ROW_CHUNK_SIZE, stop))
+        return
+
+    skip = offset
+    for indexes in iter_row_indexes(columns, filters, ROW_CHUNK_SIZE):
+        if remaining == 0:
+            return
+        if skip >= len(indexes):
+            skip -= len(indexes)
+            continue
+        indexes = indexes[skip:] if remaining is None else indexes[skip:skip + remaining]
+        skip = 0
+        if remaining is not None:
+            remaining -= len(indexes)
+        yield indexes
+
+
+@async_basic_auth
+async def async_dataset_report(request, dataset_id):
+    """
+    GET /api/datasets/<id>/report/
+    Build the PDF report in the executor and stream it as a download.
+    """
+    if request.method != 'GET':
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+
+    try:
+        with span('db_read'):
+            dataset = await Dataset.objects.aget(id=dataset_id)
+    except Dataset.DoesNotExist:
+        return JsonResponse({"error": "Dataset not found"}, status=404)
+    await dataset.aprefetch_overlay()
+
+    pdf_bytes = await run_cpu(build_dataset_report, dataset)
+    record_bytes(len(pdf_bytes), direction='out')
+
+    async def stream():
+        for start in range(0, len(pdf_bytes), PDF_CHUNK_SIZE):
+            yield pdf_bytes[start:start + PDF_CHUNK_SIZE]
+
+    response = StreamingHttpResponse(stream(), content_type='application/pdf')
+    response['Content-Length'] = str(len(pdf_bytes))
+    response['Content-Disposition'] = f'attachment; filename="equipment_report_{dataset.id}.pdf"'
+    return response
+
+
+# Basic auth is not cookie-based, so CSRF does not apply. Set as an attribute
+# rather than with @csrf_exempt, whose wrapper is sync-only on Django 4.2.
+async_dataset_rows.csrf_exempt = True
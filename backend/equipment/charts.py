@@ -0,0 +1,34 @@
+"""
+Equipment App - Report Charts
+Chart images for PDF reports, cached per dataset and chart spec. Drawing
+lives in equipment.plotting, shared with the desktop client.
+"""
+from django.core.cache import cache
+
+from .plotting import render_chart
+
+CHART_CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
+
+# Bump when the drawings change, so cached images from older code are not reused
+CHART_STYLE_VERSION = 2
+
+
+def chart_cache_key(dataset, chart, fmt='png', dpi=110):
+    """
+    Cache key for a rendered chart. Includes the dataset's revision, which
+    is bumped whenever rows are upserted, so changed datasets get fresh charts.
+    """
+    return f"chart:v{CHART_STYLE_VERSION}:{dataset.id}:r{dataset.revision}:{chart}:{fmt}:{dpi}"
+
+
+def get_chart(dataset, chart, fmt='png', dpi=110):
+    """
+    Return the rendered chart for a dataset, rendering it on a cache miss.
+    Reads the decoded columns directly; no per-row records are built.
+    """
+    key = chart_cache_key(dataset, chart, fmt, dpi)
+    image = cache.get(key)
+    if image is None:
+        image = render_chart(chart, dataset.type_distribution, dataset.columns(), fmt, dpi)
+        cache.set(key, image, CHART_CACHE_TIMEOUT)
+    return image
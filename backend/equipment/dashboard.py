@@ -0,0 +1,84 @@
+"""
+Equipment App - Dashboard Summaries
+The handful of numbers the dashboards paint first (averages, total flow,
+unit count, type composition, anomaly count), shaped once at ingest, stored
+on the dataset and served from the cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .aggregates import percentiles
+
+LATEST = 'latest'
+
+
+def dashboard_cache_key(dataset_id):
+    return f"dashboard:{dataset_id}"
+
+
+def _timeout():
+    return getattr(settings, 'EQUIPMENT_DASHBOARD_CACHE_TIMEOUT', 300)
+
+
+def build_dashboard(dataset):
+    """
+    Pre-shaped dashboard payload from a dataset's stored summary fields.
+    """
+    count = dataset.total_count
+    sums = (dataset.running_stats or {}).get('sums', {})
+    total_flowrate = sums.get('flowrate', dataset.avg_flowrate * count)
+    distribution = dataset.type_distribution or {}
+    composition = sorted(distribution.items(), key=lambda item: (-item[1], item[0]))
+    return {
+        "id": dataset.id,
+        "filename": dataset.filename,
+        "timestamp": dataset.uploaded_at.isoformat(),
+        "revision": dataset.revision,
+        "summary": {
+            "total_count": count,
+            "avg_flowrate": dataset.avg_flowrate,
+            "avg_pressure": dataset.avg_pressure,
+            "avg_temperature": dataset.avg_temperature,
+            "total_flowrate": total_flowrate,
+            "anomaly_count": (dataset.running_stats or {}).get('anomalies', 0),
+            "type_distribution": distribution,
+        },
+        "type_composition": [
+            {"type": eq_type, "count": n, "share": round(n / count, 4) if count else 0.0}
+            for eq_type, n in composition
+        ],
+        "percentiles": percentiles(dataset.running_stats),
+    }
+
+
+def publish_dashboard(dataset, latest=False):
+    """
+    Write a dataset's stored dashboard through to the cache; `latest` also
+    updates the newest-dataset alias. Call after the write has committed.
+    """
+    timeout = _timeout()
+    cache.set(dashboard_cache_key(dataset.id), dataset.dashboard, timeout)
+    cached_latest = cache.get(dashboard_cache_key(LATEST))
+    if latest or (cached_latest and cached_latest.get('id') == dataset.id):
+        cache.set(dashboard_cache_key(LATEST), dataset.dashboard, timeout)
+
+
+def invalidate_dashboards(dataset_ids):
+    """
+    Drop cached dashboards for deleted datasets.
+    """
+    if not dataset_ids:
+        return
+    keys = [dashboard_cache_key(dataset_id) for dataset_id in dataset_ids]
+    cached_latest = cache.get(dashboard_cache_key(LATEST))
+    if cached_latest and cached_latest.get('id') in set(dataset_ids):
+        keys.append(dashboard_cache_key(LATEST))
+    cache.delete_many(keys)
+
+
+def cache_dashboard(dataset_id, payload):
+    cache.set(dashboard_cache_key(dataset_id), payload, _timeout())
+
+
+def cached_dashboard(dataset_id):
+    return cache.get(dashboard_cache_key(dataset_id))
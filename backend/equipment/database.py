@@ -0,0 +1,39 @@
+"""
+Equipment App - Database Connection Tuning
+Per-connection SQLite settings so concurrent uploads queue for the write
+lock instead of failing with "database is locked".
+
+The journal mode is stored in the database file, so it is only switched by
+processes that serve requests (config.wsgi / config.asgi, which runserver
+also loads). Management commands such as `check` or `migrate` leave the
+file as it is and create no -wal/-shm files next to it.
+"""
+from django.conf import settings
+
+_serving = False
+
+
+def serve_requests():
+    """
+    Mark this process as a server, so its SQLite connections switch to the
+    configured journal mode. Called by the WSGI and ASGI entry points.
+    """
+    global _serving
+    _serving = True
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    connection_created receiver: WAL journaling lets readers run alongside
+    a writer, and the busy timeout makes writers wait for the lock.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    options = settings.EQUIPMENT_SQLITE
+    with connection.cursor() as cursor:
+        if _serving and options.get('JOURNAL_MODE') and not connection.is_in_memory_db():
+            cursor.execute(f"PRAGMA journal_mode={options['JOURNAL_MODE']}")
+            if options['JOURNAL_MODE'].upper() == 'WAL':
+                # Durable at checkpoints; the usual pairing with WAL
+                cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(options.get('BUSY_TIMEOUT_MS', 0))}")
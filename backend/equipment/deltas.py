@@ -0,0 +1,215 @@
+"""
+Equipment App - Incremental Row Upserts
+Merges new or changed rows into an existing dataset by equipment name.
+Upserted rows are written to DatasetRow and the stored summary is updated
+from running aggregates, so the work per request tracks the delta size.
+Once enough rows have accumulated they are compacted into the payload.
+"""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .aggregates import apply_delta, build_running_stats
+from .anomalies import detect_anomalies, score_against
+from .dashboard import build_dashboard, publish_dashboard
+from .instrumentation import span
+from .models import OVERLAY_FIELDS, Dataset, DatasetRow, merge_overlay
+from .search import schedule_reindex
+from .storage import ANOMALY_FIELDS, ROW_FIELDS, decode_columns
+
+# Compact once upserted rows exceed this many, or this share of the dataset
+COMPACT_MIN_ROWS = 1000
+COMPACT_RATIO = 0.2
+
+# Per-process cache of payload name indexes, keyed by (dataset id, base revision).
+# Bounded by the uncompressed payload bytes of the cached datasets; a decoded
+# index holds about four times that in memory. A payload larger than the whole
+# budget is indexed for its upsert but not kept.
+MAX_CACHED_INDEX_BYTES = 16 * 1024 * 1024
+
+_index_lock = threading.Lock()
+_index_cache = OrderedDict()  # key -> (raw bytes, PayloadIndex)
+_index_cache_bytes = 0
+
+# Validated DataFrame column -> row field
+_FRAME_FIELDS = {
+    'Equipment Name': 'equipment_name',
+    'Type': 'type',
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+
+class PayloadIndex:
+    """
+    Decoded payload columns plus equipment name -> row positions.
+    Built once per payload version, then reused by later upserts.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.positions = {}
+        for i, name in enumerate(columns['equipment_name']):
+            self.positions.setdefault(name, []).append(i)
+
+    def rows_for(self, names):
+        indexes = [i for name in names for i in self.positions.get(name, ())]
+        rows = {field: [self.columns[field][i] for i in indexes] for field in ROW_FIELDS}
+        for field in ANOMALY_FIELDS:
+            # Payloads stored without anomaly scoring count as unflagged
+            column = self.columns.get(field)
+            rows[field] = [column[i] for i in indexes] if column is not None else [0] * len(indexes)
+        return rows
+
+
+def _payload_index(dataset):
+    global _index_cache_bytes
+    key = (dataset.id, dataset.base_revision)
+    with _index_lock:
+        entry = _index_cache.get(key)
+        if entry is not None:
+            _index_cache.move_to_end(key)
+            return entry[1]
+
+    payload = Dataset.objects.filter(id=dataset.id).values_list('payload', flat=True).get()
+    index = PayloadIndex(decode_columns(payload))
+    size = dataset.raw_size
+    if size > MAX_CACHED_INDEX_BYTES:
+        return index
+    with _index_lock:
+        # Indexes of this dataset's older payloads are never read again
+        for stale in [k for k in _index_cache if k[0] == dataset.id]:
+            _index_cache_bytes -= _index_cache.pop(stale)[0]
+        _index_cache[key] = (size, index)
+        _index_cache_bytes += size
+        while _index_cache_bytes > MAX_CACHED_INDEX_BYTES:
+            _, (evicted, _) = _index_cache.popitem(last=False)
+            _index_cache_bytes -= evicted
+    return index
+
+
+def _empty_columns():
+    return {field: [] for field in OVERLAY_FIELDS}
+
+
+def _extend(columns, other):
+    for field in OVERLAY_FIELDS:
+        columns[field].extend(other[field])
+
+
+def _score_delta(dataset, frame, delta):
+    """
+    Score upserted rows against the dataset's ingest-time baseline; rows of
+    datasets stored without one are left unflagged.
+    """
+    if dataset.anomaly_baseline:
+        result = score_against(frame, dataset.anomaly_baseline, settings.EQUIPMENT_ANOMALY['Z_THRESHOLD'])
+        delta['anomaly_score'] = result.scores.tolist()
+        delta['anomaly_flags'] = result.flags.tolist()
+    else:
+        delta['anomaly_score'] = [0.0] * len(frame)
+        delta['anomaly_flags'] = [0] * len(frame)
+
+
+def _compact(dataset):
+    """
+    Fold upserted rows into the payload and recompute exact running sums.
+    Scored datasets are rescored against a fresh baseline, as at ingest.
+    """
+    payload = Dataset.objects.filter(id=dataset.id).values_list('payload', flat=True).get()
+    columns = merge_overlay(decode_columns(payload), dataset.overlay.order_by('id').values_list(*OVERLAY_FIELDS))
+    if dataset.anomaly_baseline:
+        frame = pd.DataFrame({column: columns[field] for column, field in _FRAME_FIELDS.items()})
+        options = settings.EQUIPMENT_ANOMALY
+        result = detect_anomalies(frame, options['Z_THRESHOLD'], options['IQR_K'])
+        columns['anomaly_score'] = result.scores.tolist()
+        columns['anomaly_flags'] = result.flags.tolist()
+        dataset.anomaly_baseline = result.baseline
+    dataset.set_columns(columns)
+    dataset.running_stats = build_running_stats(columns)
+    dataset.overlay.all().delete()
+    dataset.overlay_rows = 0
+    dataset.base_revision = dataset.revision
+
+
+def upsert_rows(dataset_id, frame):
+    """
+    Merge a validated DataFrame (canonical columns) into a dataset.
+    Rows are matched by equipment name; the last occurrence in the delta
+    wins. Returns the updated Dataset and the inserted/updated counts.
+    Raises Dataset.DoesNotExist for an unknown id.
+    """
+    frame = frame.drop_duplicates(subset='Equipment Name', keep='last')
+    delta = {field: frame[column].tolist() for column, field in _FRAME_FIELDS.items()}
+    names = delta['equipment_name']
+
+    with transaction.atomic():
+        with span('db_read'):
+            # Bumping the revision first takes the row/write lock up front,
+            # which SQLite needs to wait on a busy lock rather than fail
+            if not Dataset.objects.filter(id=dataset_id).update(revision=F('revision') + 1):
+                raise Dataset.DoesNotExist(f"Dataset {dataset_id} not found")
+            dataset = Dataset.objects.defer('payload').get(id=dataset_id)
+            existing = {
+                row[0]: row for row in
+                DatasetRow.objects.filter(dataset=dataset, equipment_name__in=names).values_list(*OVERLAY_FIELDS)
+            }
+
+        with span('anomalies'):
+            _score_delta(dataset, frame, delta)
+
+        with span('lookup'):
+            removed = _empty_columns()
+            for row in existing.values():
+                for field, value in zip(OVERLAY_FIELDS, row):
+                    removed[field].append(value)
+            fresh = [name for name in names if name not in existing]
+            in_payload = 0
+            if fresh:
+                from_payload = _payload_index(dataset).rows_for(fresh)
+                in_payload = len(set(from_payload['equipment_name']))
+                _extend(removed, from_payload)
+
+        with span('stats'):
+            apply_delta(dataset, delta, removed)
+
+        # Spans stay disjoint so Server-Timing does not count compaction twice
+        with span('db_write'):
+            DatasetRow.objects.bulk_create(
+                [DatasetRow(dataset=dataset, **dict(zip(OVERLAY_FIELDS, values)))
+                 for values in zip(*(delta[field] for field in OVERLAY_FIELDS))],
+                update_conflicts=True,
+                unique_fields=['dataset', 'equipment_name'],
+                update_fields=[field for field in OVERLAY_FIELDS if field != 'equipment_name'],
+            )
+        dataset.overlay_rows += len(fresh)
+        update_fields = ['total_count', 'avg_flowrate', 'avg_pressure', 'avg_temperature',
+                         'type_distribution', 'running_stats', 'overlay_rows', 'dashboard']
+        if dataset.overlay_rows > max(COMPACT_MIN_ROWS, COMPACT_RATIO * dataset.total_count):
+            with span('compact'):
+                _compact(dataset)
+            update_fields += ['payload', 'payload_size', 'raw_size', 'base_revision', 'anomaly_baseline']
+        # Built last: compaction rescores the rows and replaces the stats
+        dataset.dashboard = build_dashboard(dataset)
+        with span('db_write'):
+            dataset.save(update_fields=update_fields)
+            transaction.on_commit(lambda: publish_dashboard(dataset))
+            transaction.on_commit(lambda: schedule_reindex(dataset.id))
+
+    inserted = len(fresh) - in_payload
+    return dataset, inserted, len(names) - inserted
+
+
+def frame_from_records(records):
+    """
+    DataFrame from a JSON list of row objects, ready for resolve_columns().
+    Values stay as given so validation sees the original cells.
+    """
+    if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+        raise ValueError("rows must be a list of objects")
+    return pd.DataFrame.from_records(records)
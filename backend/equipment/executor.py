@@ -0,0 +1,46 @@
+"""
+Equipment App - CPU Executor
+Bounded worker pool for CPU-heavy work (parsing, decompression, PDF
+rendering) called from async views, so the event loop stays responsive.
+"""
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.EQUIPMENT_CPU_WORKERS,
+            thread_name_prefix='equipment-cpu',
+        )
+    return _executor
+
+
+async def run_cpu(func, *args, **kwargs):
+    """
+    Run func in the bounded pool. The caller's context is copied so spans
+    recorded inside still attach to the current request trace.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_executor(), call)
+
+
+def drain_executor():
+    """
+    Wait for all queued work (e.g. background index builds) to finish and
+    start a fresh pool on next use. For benchmarks, so one measurement does
+    not run alongside the previous one's background work.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
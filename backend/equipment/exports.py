@@ -0,0 +1,363 @@
+"""
+Equipment App - Dataset Exports
+Chunked CSV / XLSX / Parquet writers. Each export is a generator of byte
+chunks, so a download starts immediately and the encoded file is never
+held in memory as a whole.
+
+The stored payload is a single compressed JSON document, so the caller
+decodes a dataset's columns in full before exporting: memory is O(dataset)
+for the decoded columns. Filtering and encoding then work chunk by chunk
+and add only O(chunk) on top.
+"""
+import csv
+import importlib.util
+import io
+import math
+import zipfile
+from xml.sax.saxutils import escape
+
+from .storage import ROW_FIELDS, row_fields
+
+EXPORT_CHUNK_ROWS = 1000
+
+# Rows per Parquet row group; chunks are batched up to this size, since
+# small row groups bloat the file and slow readers down
+PARQUET_ROW_GROUP_ROWS = 128 * 1024
+
+# One worksheet holds 1,048,576 rows including the header
+MAX_XLSX_ROWS = 1048575
+
+# Column headers match the upload schema so exports can be re-imported
+EXPORT_HEADERS = {
+    'equipment_name': 'Equipment Name',
+    'type': 'Type',
+    'flowrate': 'Flowrate',
+    'pressure': 'Pressure',
+    'temperature': 'Temperature',
+    'anomaly_score': 'Anomaly Score',
+    'anomaly_flags': 'Anomaly Flags',
+}
+
+NUMERIC_FIELDS = ('flowrate', 'pressure', 'temperature')
+
+# Parquet column types (pyarrow aliases); anything else is written as string
+PARQUET_TYPES = {
+    **{field: 'float64' for field in NUMERIC_FIELDS},
+    'anomaly_score': 'float64',
+    'anomaly_flags': 'int64',
+}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+class ExportError(ValueError):
+    """
+    Invalid export parameters or an unavailable format.
+    """
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only, non-seekable stream that collects bytes until drained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parse_export_params(params):
+    """
+    Read format, column selection and row filters from a query string.
+
+    Supported filters: type=Pump,Valve, min_<field>/max_<field> for the
+    numeric fields, anomalous=true and min_anomaly_score. columns=
+    equipment_name,flowrate selects output columns; by default every stored
+    column is exported (columns is None).
+    """
+    fmt = params.get('format', 'csv').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+
+    columns = None
+    if params.get('columns'):
+        columns = [c.strip() for c in params['columns'].split(',') if c.strip()]
+        unknown = [c for c in columns if c not in EXPORT_HEADERS]
+        if unknown or not columns:
+            raise ExportError(f"Unknown columns: {', '.join(unknown) or '(none)'}")
+
+    filters = {}
+    if params.get('type'):
+        filters['type'] = {t.strip() for t in params['type'].split(',') if t.strip()}
+    for field in NUMERIC_FIELDS:
+        for bound in ('min', 'max'):
+            key = f"{bound}_{field}"
+            if params.get(key) not in (None, ''):
+                try:
+                    filters[key] = float(params[key])
+                except ValueError:
+                    raise ExportError(f"{key} must be a number")
+    filters.update(parse_anomaly_filters(params, ExportError))
+    return fmt, columns, filters
+
+
+def parse_anomaly_filters(params, error=ValueError):
+    """
+    anomalous=true|false and min_anomaly_score=<number> from a query string,
+    shared by exports and the rows endpoint. Raises `error` on bad values.
+    """
+    filters = {}
+    flag = params.get('anomalous', '').lower()
+    if flag:
+        if flag not in ('true', '1', 'false', '0'):
+            raise error("anomalous must be true or false")
+        filters['anomalous'] = flag in ('true', '1')
+    if params.get('min_anomaly_score') not in (None, ''):
+        try:
+            filters['min_anomaly_score'] = float(params['min_anomaly_score'])
+        except ValueError:
+            raise error("min_anomaly_score must be a number")
+    return filters
+
+
+def anomaly_mask(columns_data, filters, start=0, stop=None):
+    """
+    Per-row booleans for the anomaly filters over rows [start, stop), or
+    None when none are set. Data stored without anomaly scoring counts as
+    unflagged, score 0.
+    """
+    if 'anomalous' not in filters and 'min_anomaly_score' not in filters:
+        return None
+    total = len(columns_data[ROW_FIELDS[0]])
+    stop = total if stop is None else min(stop, total)
+    count = max(0, stop - start)
+    flags = columns_data['anomaly_flags'][start:stop] if 'anomaly_flags' in columns_data else [0] * count
+    scores = columns_data['anomaly_score'][start:stop] if 'anomaly_score' in columns_data else [0.0] * count
+    mask = [True] * count
+    if 'anomalous' in filters:
+        wanted = filters['anomalous']
+        mask = [keep and bool(flag) == wanted for keep, flag in zip(mask, flags)]
+    if 'min_anomaly_score' in filters:
+        low = filters['min_anomaly_score']
+        mask = [keep and score >= low for keep, score in zip(mask, scores)]
+    return mask
+
+
+def iter_row_indexes(columns_data, filters, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yield lists of the row indexes that pass the filters, chunk by chunk.
+    """
+    total = len(columns_data[ROW_FIELDS[0]])
+    types = filters.get('type')
+    bounds = []
+    for field in NUMERIC_FIELDS:
+        low = filters.get(f"min_{field}")
+        high = filters.get(f"max_{field}")
+        if low is not None or high is not None:
+            bounds.append((columns_data[field], low, high))
+    type_col = columns_data['type']
+
+    for start in range(0, total, chunk_rows):
+        stop = min(start + chunk_rows, total)
+        mask = anomaly_mask(columns_data, filters, start, stop)
+        chunk = []
+        for i in range(start, stop):
+            if mask is not None and not mask[i - start]:
+                continue
+            if types is not None and type_col[i] not in types:
+                continue
+            if any((low is not None and not values[i] >= low) or (high is not None and not values[i] <= high)
+                   for values, low, high in bounds):
+                continue
+            chunk.append(i)
+        if chunk:
+            yield chunk
+
+
+def iter_filtered_rows(columns_data, columns, filters, chunk_rows=EXPORT_CHUNK_ROWS):
+    """
+    Yield lists of row tuples (in `columns` order) from columnar data,
+    applying the row filters chunk by chunk.
+    """
+    selected = [columns_data[c] for c in columns]
+    for indexes in iter_row_indexes(columns_data, filters, chunk_rows):
+        yield [tuple(col[i] for col in selected) for i in indexes]
+
+
+def iter_csv(row_chunks, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([EXPORT_HEADERS[c] for c in columns])
+    for chunk in row_chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Equipment" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if isinstance(value, float) and not math.isfinite(value):
+            return '<c/>'
+        return f'<c><v>{value!r}</v></c>'
+    if value is None:
+        return '<c/>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(v) for v in values) + '</row>'
+
+
+def iter_xlsx(row_chunks, columns):
+    """
+    Minimal single-sheet workbook written straight into a streaming zip.
+    Inline strings avoid a shared-strings table that would need every
+    value up front.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', _XLSX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', _XLSX_ROOT_RELS)
+        archive.writestr('xl/workbook.xml', _XLSX_WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', _XLSX_WORKBOOK_RELS)
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row([EXPORT_HEADERS[c] for c in columns]).encode('utf-8'))
+            yield sink.drain()
+            for chunk in row_chunks:
+                sheet.write(''.join(_xlsx_row(row) for row in chunk).encode('utf-8'))
+                data = sink.drain()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+def iter_parquet(row_chunks, columns):
+    """
+    Chunks batched into row groups of up to PARQUET_ROW_GROUP_ROWS rows.
+    Requires the optional pyarrow package.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (EXPORT_HEADERS[c], pa.type_for_alias(PARQUET_TYPES.get(c, 'string'))) for c in columns
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def write_group(rows):
+        arrays = [pa.array(list(values), type=field.type) for values, field in zip(zip(*rows), schema)]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema), row_group_size=PARQUET_ROW_GROUP_ROWS)
+        return sink.drain()
+
+    try:
+        pending = []
+        for chunk in row_chunks:
+            pending += chunk
+            while len(pending) >= PARQUET_ROW_GROUP_ROWS:
+                data = write_group(pending[:PARQUET_ROW_GROUP_ROWS])
+                del pending[:PARQUET_ROW_GROUP_ROWS]
+                if data:
+                    yield data
+        if pending:
+            yield write_group(pending)
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+_WRITERS = {
+    'csv': iter_csv,
+    'xlsx': iter_xlsx,
+    'parquet': iter_parquet,
+}
+
+
+def iter_export(columns_data, fmt, columns, filters):
+    """
+    Generator of encoded byte chunks for a dataset export.
+    """
+    if columns is None:
+        columns = row_fields(columns_data)
+    missing = [c for c in columns if c not in columns_data]
+    if missing:
+        raise ExportError(f"Columns not stored for this dataset: {', '.join(missing)}")
+    # Fail before the response starts rather than mid-stream
+    if fmt == 'parquet':
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ExportError("Parquet export requires the pyarrow package")
+    if fmt == 'xlsx' and len(columns_data[ROW_FIELDS[0]]) > MAX_XLSX_ROWS:
+        # Counting the filtered rows is a pass without encoding
+        rows = sum(len(indexes) for indexes in iter_row_indexes(columns_data, filters))
+        if rows > MAX_XLSX_ROWS:
+            raise ExportError(
+                f"XLSX holds at most {MAX_XLSX_ROWS} rows per sheet and this export has {rows}; "
+                "use CSV or Parquet, or filter the rows"
+            )
+    return _WRITERS[fmt](iter_filtered_rows(columns_data, columns, filters), columns)
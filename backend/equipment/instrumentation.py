@@ -0,0 +1,257 @@
+"""
+Equipment App - Request Instrumentation
+Per-request spans exposed as Server-Timing headers, process-local Prometheus
+metrics (served at /api/metrics/ by views.MetricsView), and opt-in
+per-request profiling for staff users.
+"""
+import contextvars
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import authentication, exceptions
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    'equipment_request_duration_seconds': ('histogram', "HTTP request latency by route, method and status."),
+    'equipment_span_duration_seconds': ('histogram', "Duration of instrumented hot-path spans."),
+    'equipment_rows_ingested_total': ('counter', "Equipment rows ingested from uploads."),
+    'equipment_bytes_processed_total': ('counter', "Bytes read from uploads or written to reports."),
+}
+
+_current_trace = contextvars.ContextVar('equipment_trace', default=None)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-memory counters and histograms. Values are per process;
+    with several workers each one exposes its own series.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    hist['buckets'][i] += 1
+            hist['sum'] += value
+            hist['count'] += 1
+
+    def render(self):
+        """
+        Prometheus text exposition format (version 0.0.4).
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: {'buckets': list(v['buckets']), 'sum': v['sum'], 'count': v['count']}
+                          for k, v in self._histograms.items()}
+
+        lines = []
+        names = sorted({name for name, _ in counters} | {name for name, _ in histograms})
+        for name in names:
+            kind, help_text = METRIC_HELP.get(name, ('untyped', name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in zip(self.buckets, hist['buckets']):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {hist['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels) + '}'
+
+
+METRICS = MetricsRegistry()
+
+
+class RequestTrace:
+    """
+    Spans recorded while handling one request, in completion order.
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def add(self, name, seconds):
+        self.spans.append((name, seconds))
+
+    def server_timing(self, total=None):
+        totals = {}
+        for name, seconds in self.spans:
+            totals[name] = totals.get(name, 0.0) + seconds
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in totals.items()]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+@contextmanager
+def span(name):
+    """
+    Time a block of work and attach it to the current request's trace.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(name, elapsed)
+        METRICS.observe('equipment_span_duration_seconds', elapsed, span=name)
+
+
+def record_rows(count):
+    METRICS.inc('equipment_rows_ingested_total', count)
+
+
+def record_bytes(count, direction):
+    METRICS.inc('equipment_bytes_processed_total', count, direction=direction)
+
+
+def _profile_mode(request):
+    if not getattr(settings, 'EQUIPMENT_PROFILING_ENABLED', False):
+        return None
+    mode = request.GET.get('profile') or request.headers.get('X-Profile')
+    if not mode or mode.lower() in ('0', 'false', 'no'):
+        return None
+    if not _is_staff(request):
+        return None
+    return 'pyinstrument' if mode.lower() == 'pyinstrument' else 'cprofile'
+
+
+def _is_staff(request):
+    """
+    Whether the request carries valid Basic credentials of an active staff
+    user. This middleware runs before the views authenticate, so it checks
+    the credentials itself, through the configured auth backends.
+    """
+    try:
+        result = authentication.BasicAuthentication().authenticate(request)
+    except exceptions.AuthenticationFailed:
+        return False
+    return result is not None and result[0].is_staff
+
+
+def _profile_with_cprofile(get_response, request):
+    profiler = cProfile.Profile()
+    response = profiler.runcall(get_response, request)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(60)
+    return response, HttpResponse(output.getvalue(), content_type='text/plain; charset=utf-8')
+
+
+def _profile_with_pyinstrument(get_response, request):
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        return _profile_with_cprofile(get_response, request)
+    profiler = Profiler()
+    profiler.start()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.stop()
+    return response, HttpResponse(profiler.output_html(), content_type='text/html; charset=utf-8')
+
+
+class RequestTimingMiddleware:
+    """
+    Records request latency and spans, adds a Server-Timing header, and when
+    EQUIPMENT_PROFILING_ENABLED is set, returns a profile for requests made
+    by a staff user with ?profile=1 (cProfile) or ?profile=pyinstrument;
+    other requests ignore the parameter. Runs natively under both WSGI and
+    ASGI; profiling is only available on the sync path.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            mode = _profile_mode(request)
+            if mode == 'pyinstrument':
+                response, report = _profile_with_pyinstrument(self.get_response, request)
+            elif mode == 'cprofile':
+                response, report = _profile_with_cprofile(self.get_response, request)
+            else:
+                response, report = self.get_response(request), None
+        finally:
+            _current_trace.reset(token)
+
+        if report is not None:
+            report['X-Profiled-Status'] = str(response.status_code)
+        return self._finish(request, response, trace, time.perf_counter() - start, replacement=report)
+
+    async def __acall__(self, request):
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_trace.reset(token)
+        return self._finish(request, response, trace, time.perf_counter() - start)
+
+    @staticmethod
+    def _finish(request, response, trace, elapsed, replacement=None):
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else 'unmatched'
+        METRICS.observe('equipment_request_duration_seconds', elapsed,
+                        route=route or '/', method=request.method, status=response.status_code)
+
+        if replacement is not None:
+            response = replacement
+        response['Server-Timing'] = trace.server_timing(total=elapsed)
+        return response
+
@@ -0,0 +1,158 @@
+"""
+Equipment App - Concurrent Upload Benchmark
+Runs N parallel uploader processes against the upload view and reports
+throughput, latency and errors (e.g. "database is locked") per level.
+
+Uploads go through the real write path, including retention pruning, so
+run it against a scratch database. Connections are tuned as in the server
+processes (see equipment.database), so SQLite runs in the configured
+journal mode:
+
+Usage: DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py benchmark_uploads --workers 1,2,4,8
+"""
+import importlib
+import multiprocessing
+import secrets
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+FILENAME_PREFIX = 'bench_'
+
+
+def _init_worker():
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from equipment.database import serve_requests
+    serve_requests()
+    # Import the upload stack (pandas etc.) before timing starts
+    importlib.import_module('equipment.views')
+
+
+def _ready(_):
+    return True
+
+
+def _upload_worker(worker, count, csv_body, user_id):
+    """
+    Upload `count` files one after another. Returns (latencies, errors).
+    """
+    from django.contrib.auth import get_user_model
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    from equipment.views import EquipmentUploadView
+
+    user = get_user_model().objects.get(pk=user_id)
+    factory = APIRequestFactory()
+    view = EquipmentUploadView.as_view()
+    latencies = []
+    errors = []
+    try:
+        for i in range(count):
+            upload = SimpleUploadedFile(f"{FILENAME_PREFIX}{worker}_{i}.csv", csv_body)
+            request = factory.post('/api/upload/', {'file': upload}, format='multipart')
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            response = view(request)
+            response.render()
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 201:
+                errors.append(response.data.get('error', f"HTTP {response.status_code}"))
+    finally:
+        connections.close_all()
+    return latencies, errors
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+class Command(BaseCommand):
+    help = "Measure upload throughput with N parallel uploaders."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4,8', help="Comma-separated concurrency levels")
+        parser.add_argument('--uploads', type=int, default=20, help="Uploads per worker at each level")
+        parser.add_argument('--rows', type=int, default=500, help="Rows per uploaded file")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Do not ask for confirmation")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(level) for level in options['workers'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError("--workers must be a comma-separated list of integers")
+
+        if options['interactive']:
+            answer = input(
+                f"Uploads run retention pruning on '{connection.settings_dict['NAME']}', which deletes "
+                "datasets. Continue? [y/N] "
+            )
+            if answer.lower() not in ('y', 'yes'):
+                raise CommandError("Benchmark cancelled.")
+
+        # Measure what the server processes run; reconnect so the tuning applies
+        from equipment.database import serve_requests
+        serve_requests()
+        connection.close()
+        self._describe_database()
+        csv_body = self._csv(options['rows'])
+
+        from django.contrib.auth import get_user_model
+        user = get_user_model().objects.create(username=f"benchmark_{secrets.token_hex(4)}")
+        # Children open their own connections
+        connections.close_all()
+        try:
+            for level in levels:
+                self._run_level(level, options['uploads'], csv_body, user.pk)
+        finally:
+            from equipment.models import Dataset
+            Dataset.objects.filter(filename__startswith=FILENAME_PREFIX).delete()
+            user.delete()
+
+    def _describe_database(self):
+        line = f"Database: {connection.vendor} {connection.settings_dict['NAME']}"
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                journal = cursor.fetchone()[0]
+                cursor.execute("PRAGMA busy_timeout")
+                timeout = cursor.fetchone()[0]
+            line += f" (journal_mode={journal}, busy_timeout={timeout}ms)"
+        self.stdout.write(line)
+
+    @staticmethod
+    def _csv(rows):
+        types = ['Pump', 'Valve', 'Reactor', 'Heat Exchanger', 'Compressor']
+        lines = ["Equipment Name,Type,Flowrate,Pressure,Temperature"]
+        lines += [f"Unit-{i},{types[i % len(types)]},{100 + i % 50}.5,{5 + i % 7}.2,{110 + i % 30}.0"
+                  for i in range(rows)]
+        return "\n".join(lines).encode()
+
+    def _run_level(self, level, uploads, csv_body, user_id):
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=level, mp_context=context, initializer=_init_worker) as pool:
+            # Start every worker first so process start-up is not timed
+            list(pool.map(_ready, range(level)))
+            start = time.perf_counter()
+            futures = [pool.submit(_upload_worker, w, uploads, csv_body, user_id) for w in range(level)]
+            results = [f.result() for f in futures]
+            elapsed = time.perf_counter() - start
+
+        latencies = [t for lat, _ in results for t in lat]
+        errors = Counter(e for _, errs in results for e in errs)
+        succeeded = len(latencies) - sum(errors.values())
+        self.stdout.write(
+            f"workers={level:<3} uploads={len(latencies):<5} ok={succeeded:<5} "
+            f"throughput={succeeded / elapsed:7.1f}/s "
+            f"p50={_percentile(latencies, 0.5) * 1000:7.1f}ms p95={_percentile(latencies, 0.95) * 1000:7.1f}ms"
+        )
+        for message, count in errors.most_common():
+            self.stdout.write(self.style.ERROR(f"    {count} x {message}"))
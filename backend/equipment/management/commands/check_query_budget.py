@@ -0,0 +1,142 @@
+"""
+Equipment App - Query Budget Check
+Seeds a large retained history inside a rolled-back transaction, calls each
+API endpoint and verifies it issues a fixed number of queries.
+
+Usage: python manage.py check_query_budget --datasets 2000
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from equipment.models import Dataset
+from equipment.views import (
+    EquipmentUploadView, DatasetHistoryView, GeneratePDFView, DatasetDashboardView, EquipmentSearchView,
+)
+
+# Maximum queries per endpoint, independent of how many datasets are retained
+QUERY_BUDGETS = {
+    'history': 1,
+    'history_meta': 1,
+    'generate_pdf': 1,
+    # At most one read; none when served from the cache
+    'dashboard': 1,
+    # Dataset listing, plus upserted rows and streamed payloads of datasets
+    # whose name index is not cached yet
+    'search': 3,
+    # The same search again: the listing only. Every index is cached now,
+    # however many datasets are retained, so no payload is read or decoded
+    'search_repeat': 1,
+    # insert, then pruning the oldest dataset: the delete's id read and the
+    # deletes of upserted rows and datasets, plus one read per enabled
+    # retention rule
+    'upload': 4 + sum(1 for rule in ('MAX_COUNT', 'MAX_AGE_DAYS', 'MAX_TOTAL_BYTES')
+                      if settings.EQUIPMENT_RETENTION.get(rule)),
+}
+
+SAMPLE_ROWS = [
+    {'equipment_name': f'Unit-{i}', 'type': ['Pump', 'Valve', 'Reactor'][i % 3],
+     'flowrate': 100.0 + i, 'pressure': 5.0 + i / 10, 'temperature': 110.0 + i}
+    for i in range(20)
+]
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _is_transaction_control(sql):
+    # BEGIN / SAVEPOINT / RELEASE / ROLLBACK TO do no data work
+    return sql.split(None, 1)[0].upper() in ('BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK', 'COMMIT')
+
+
+class Command(BaseCommand):
+    help = "Check per-endpoint query counts and timings against a seeded history."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--datasets', type=int, default=1000, help="Number of datasets to seed")
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                self._seed(options['datasets'])
+                failures = self._run_checks()
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+        if failures:
+            raise CommandError("Query budget exceeded: " + "; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All endpoints within query budget."))
+
+    def _seed(self, count):
+        now = timezone.now()
+        Dataset.objects.bulk_create([
+            Dataset(
+                id=f"budget_{i}",
+                filename=f"budget_{i}.csv",
+                uploaded_at=now - timedelta(minutes=i + 1),
+                content_hash=f"{i:064x}",
+                total_count=len(SAMPLE_ROWS),
+                avg_flowrate=109.5,
+                avg_pressure=5.95,
+                avg_temperature=119.5,
+                type_distribution={'Pump': 7, 'Valve': 7, 'Reactor': 6},
+                data=SAMPLE_ROWS,
+            )
+            for i in range(count)
+        ], batch_size=500)
+        self.stdout.write(f"Seeded {count} datasets.")
+
+    def _run_checks(self):
+        user = get_user_model().objects.create(username='query_budget_check')
+        factory = APIRequestFactory()
+        csv_body = "Equipment Name,Type,Flowrate,Pressure,Temperature\n" + "\n".join(
+            f"{r['equipment_name']},{r['type']},{r['flowrate']},{r['pressure']},{r['temperature']}" for r in SAMPLE_ROWS
+        )
+
+        calls = {
+            'history': (DatasetHistoryView, lambda: factory.get('/api/history/')),
+            'history_meta': (DatasetHistoryView, lambda: factory.get('/api/history/', {'include_data': 'false'})),
+            'generate_pdf': (GeneratePDFView, lambda: factory.post(
+                '/api/generate-pdf/', {'id': 'budget_0'}, format='json')),
+            'dashboard': (DatasetDashboardView, lambda: factory.get('/api/datasets/budget_0/dashboard/'),
+                          {'dataset_id': 'budget_0'}),
+            'search': (EquipmentSearchView, lambda: factory.get('/api/search/', {'q': 'unit-1', 'type': 'Pump'})),
+            'search_repeat': (EquipmentSearchView, lambda: factory.get('/api/search/', {'q': 'unit-1', 'type': 'Pump'})),
+            # Last, since it prunes the seeded history
+            'upload': (EquipmentUploadView, lambda: factory.post(
+                '/api/upload/', {'file': SimpleUploadedFile('budget.csv', csv_body.encode())}, format='multipart')),
+        }
+
+        failures = []
+        for name, (view, build, *view_kwargs) in calls.items():
+            if name == 'upload':
+                # Prune the seeded backlog first, so the upload prunes what a
+                # steady-state upload does; deletes go in batches of 100
+                Dataset.maintain_history_limit()
+            request = build()
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = view.as_view()(request, **(view_kwargs[0] if view_kwargs else {}))
+                if hasattr(response, 'render'):
+                    response.render()
+                elapsed = (time.perf_counter() - start) * 1000
+            queries = sum(1 for q in ctx.captured_queries if not _is_transaction_control(q['sql']))
+            budget = QUERY_BUDGETS[name]
+            ok = queries <= budget and response.status_code < 400
+            line = f"{name:<14} status={response.status_code} queries={queries}/{budget} time={elapsed:.1f}ms"
+            self.stdout.write(self.style.SUCCESS(line) if ok else self.style.ERROR(line))
+            if not ok:
+                failures.append(f"{name} ({queries} queries, status {response.status_code})")
+        return failures
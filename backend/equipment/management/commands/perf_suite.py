@@ -0,0 +1,148 @@
+"""
+Equipment App - Scale Performance Suite
+Times the upload view, the history endpoint and PDF generation against
+seeded synthetic datasets (equipment.synthetic) at one or more sizes, so
+runs are repeatable and comparable across commits.
+
+Fixtures are generated once per (rows, seed, format) and reused from
+--fixtures-dir. Each step runs --repeat times; the first run is reported
+separately since it includes cold caches (e.g. chart rendering for PDFs).
+Background work queued by a step (search index builds) finishes before
+the next measurement starts.
+
+Uploads go through the real write path, including retention pruning, so
+run it against a scratch database:
+
+Usage: DATABASE_URL=sqlite:////tmp/perf.sqlite3 python manage.py perf_suite --rows 1000,100000,1000000 --repeat 3
+"""
+import json
+import os
+import secrets
+import statistics
+import time
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from equipment.executor import drain_executor
+from equipment.synthetic import DEFAULT_FIXTURES_DIR, ensure_fixture
+
+FILENAME_PREFIX = 'perf_'
+UPLOAD_FORMATS = ('csv', 'xlsx')
+
+
+class Command(BaseCommand):
+    help = "Time upload, history and PDF generation on synthetic datasets of several sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='1000,100000', help="Comma-separated dataset sizes")
+        parser.add_argument('--seed', type=int, default=0, help="Synthetic data seed")
+        parser.add_argument('--format', choices=UPLOAD_FORMATS, default='csv', help="Upload file format")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs per step")
+        parser.add_argument('--fixtures-dir', default=DEFAULT_FIXTURES_DIR,
+                            help="Where generated fixtures are kept between runs")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help="Do not ask for confirmation")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['rows'].split(',') if size.strip()]
+        except ValueError:
+            raise CommandError("--rows must be a comma-separated list of integers")
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        if options['interactive']:
+            answer = input(
+                f"Uploads run retention pruning on '{connection.settings_dict['NAME']}', which deletes "
+                "datasets. Continue? [y/N] "
+            )
+            if answer.lower() not in ('y', 'yes'):
+                raise CommandError("Performance suite cancelled.")
+
+        from django.contrib.auth import get_user_model
+        self.user = get_user_model().objects.create(username=f"perf_{secrets.token_hex(4)}")
+        self.factory = APIRequestFactory()
+        results = []
+        try:
+            for rows in sizes:
+                path = self._fixture(options['fixtures_dir'], rows, options['seed'], options['format'])
+                results += self._run_size(rows, path, options['repeat'])
+        finally:
+            drain_executor()
+            from equipment.models import Dataset
+            Dataset.objects.filter(filename__startswith=FILENAME_PREFIX).delete()
+            self.user.delete()
+
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump({'seed': options['seed'], 'format': options['format'], 'results': results}, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+    def _fixture(self, directory, rows, seed, fmt):
+        path, elapsed = ensure_fixture(rows, seed, fmt, directory)
+        if elapsed:
+            self.stdout.write(f"Generated {path} ({os.path.getsize(path) / 1e6:.1f} MB) in {elapsed:.1f}s")
+        return path
+
+    def _call(self, view, request, **kwargs):
+        force_authenticate(request, user=self.user)
+        wall, cpu = time.perf_counter(), time.process_time()
+        response = view.as_view()(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        timing = (time.perf_counter() - wall, time.process_time() - cpu)
+        drain_executor()
+        return response, timing
+
+    def _run_size(self, rows, path, repeat):
+        from equipment.views import EquipmentUploadView, DatasetHistoryView, GeneratePDFView
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        ext = os.path.splitext(path)[1]
+        dataset_id = None
+
+        def upload(i):
+            nonlocal dataset_id
+            upload = SimpleUploadedFile(f"{FILENAME_PREFIX}{rows}_{i}{ext}", body)
+            response, timing = self._call(
+                EquipmentUploadView, self.factory.post('/api/upload/', {'file': upload}, format='multipart'))
+            if response.status_code == 201:
+                dataset_id = response.data['id']
+            return response, timing
+
+        steps = [
+            ('upload', upload),
+            ('history', lambda i: self._call(
+                DatasetHistoryView, self.factory.get('/api/history/', {'limit': 1}))),
+            ('history_meta', lambda i: self._call(
+                DatasetHistoryView, self.factory.get('/api/history/', {'include_data': 'false'}))),
+            ('generate_pdf', lambda i: self._call(
+                GeneratePDFView, self.factory.post('/api/generate-pdf/', {'id': dataset_id}, format='json'))),
+        ]
+
+        results = []
+        for step, run in steps:
+            walls, cpus, errors = [], [], []
+            for i in range(repeat):
+                response, (wall, cpu) = run(i)
+                walls.append(wall)
+                cpus.append(cpu)
+                if response.status_code >= 400:
+                    errors.append(response.data.get('error', f"HTTP {response.status_code}"))
+            results.append({
+                'rows': rows, 'step': step, 'wall': walls, 'cpu': cpus, 'errors': errors,
+            })
+            line = (
+                f"rows={rows:<9} {step:<13} first={walls[0] * 1000:9.1f}ms "
+                f"min={min(walls) * 1000:9.1f}ms median={statistics.median(walls) * 1000:9.1f}ms "
+                f"cpu_median={statistics.median(cpus) * 1000:9.1f}ms"
+            )
+            self.stdout.write(self.style.ERROR(line) if errors else line)
+            for message in sorted(set(errors)):
+                self.stdout.write(self.style.ERROR(f"    {errors.count(message)} x {message}"))
+        return results
@@ -0,0 +1,73 @@
+"""
+Equipment App - Storage Usage Report
+Summarizes how much space retained datasets use and projects growth.
+
+Usage: python manage.py storage_report [--top 10]
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Avg, Count, Max, Min, Sum
+
+from equipment.models import Dataset
+
+
+def _fmt_bytes(n):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024:
+            return f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+class Command(BaseCommand):
+    help = "Report dataset storage usage, compression ratio and retention projection."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help="Show the N largest datasets")
+
+    def handle(self, *args, **options):
+        totals = Dataset.objects.aggregate(
+            count=Count('id'),
+            stored=Sum('payload_size'),
+            raw=Sum('raw_size'),
+            avg_stored=Avg('payload_size'),
+            rows=Sum('total_count'),
+            oldest=Min('uploaded_at'),
+            newest=Max('uploaded_at'),
+        )
+        count = totals['count']
+        stored = totals['stored'] or 0
+        raw = totals['raw'] or 0
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Dataset storage"))
+        self.stdout.write(f"  Datasets retained:   {count}")
+        self.stdout.write(f"  Rows retained:       {totals['rows'] or 0}")
+        self.stdout.write(f"  Payload (stored):    {_fmt_bytes(stored)}")
+        self.stdout.write(f"  Payload (raw JSON):  {_fmt_bytes(raw)}")
+        if stored:
+            self.stdout.write(f"  Compression ratio:   {raw / stored:.1f}x")
+        if count:
+            self.stdout.write(f"  Oldest / newest:     {totals['oldest']:%Y-%m-%d %H:%M} / {totals['newest']:%Y-%m-%d %H:%M}")
+            self.stdout.write(f"  Projected 365 daily: {_fmt_bytes((totals['avg_stored'] or 0) * 365)}")
+
+        if connection.vendor == 'sqlite':
+            db_path = settings.DATABASES['default']['NAME']
+            if os.path.exists(db_path):
+                self.stdout.write(f"  SQLite file size:    {_fmt_bytes(os.path.getsize(db_path))}")
+
+        policy = settings.EQUIPMENT_RETENTION
+        self.stdout.write(self.style.MIGRATE_HEADING("Retention policy (0 = unlimited)"))
+        self.stdout.write(f"  Max count:           {policy.get('MAX_COUNT') or 0}")
+        self.stdout.write(f"  Max age (days):      {policy.get('MAX_AGE_DAYS') or 0}")
+        self.stdout.write(f"  Max total bytes:     {_fmt_bytes(policy.get('MAX_TOTAL_BYTES') or 0)}")
+
+        top = options['top']
+        if top and count:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Largest {top} datasets"))
+            largest = Dataset.objects.order_by('-payload_size').values_list(
+                'id', 'filename', 'total_count', 'payload_size', 'raw_size')[:top]
+            for dataset_id, filename, rows, size, raw_size in largest:
+                self.stdout.write(f"  {dataset_id:<32} {filename:<32} {rows:>8} rows  {_fmt_bytes(size):>10}  (raw {_fmt_bytes(raw_size)})")
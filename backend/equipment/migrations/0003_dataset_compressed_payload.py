@@ -0,0 +1,75 @@
+import json
+import zlib
+
+from django.db import migrations, models
+
+# Frozen copy of the payload codec as this migration wrote it (format 1,
+# base row fields only), so later changes to equipment.storage cannot
+# change what it writes or reads back.
+ROW_FIELDS = ('equipment_name', 'type', 'flowrate', 'pressure', 'temperature')
+
+
+def encode_rows(rows):
+    columns = {field: [row[field] for row in rows] for field in ROW_FIELDS}
+    raw = json.dumps({'v': 1, 'columns': columns}, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(raw, 6), len(raw)
+
+
+def decode_rows(payload):
+    if not payload:
+        return []
+    columns = json.loads(zlib.decompress(bytes(payload)))['columns']
+    return [dict(zip(ROW_FIELDS, values)) for values in zip(*(columns[field] for field in ROW_FIELDS))]
+
+
+def compress_rows(apps, schema_editor):
+    Dataset = apps.get_model('equipment', 'Dataset')
+    for dataset in Dataset.objects.iterator(chunk_size=100):
+        payload, raw_size = encode_rows(dataset.data or [])
+        dataset.payload = payload
+        dataset.payload_size = len(payload)
+        dataset.raw_size = raw_size
+        dataset.save(update_fields=['payload', 'payload_size', 'raw_size'])
+
+
+def decompress_rows(apps, schema_editor):
+    Dataset = apps.get_model('equipment', 'Dataset')
+    for dataset in Dataset.objects.iterator(chunk_size=100):
+        dataset.data = decode_rows(dataset.payload)
+        dataset.save(update_fields=['data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0002_dataset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='payload',
+            field=models.BinaryField(default=b''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='payload_size',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='raw_size',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dataset',
+            name='data',
+            field=models.JSONField(null=True),
+        ),
+        migrations.RunPython(compress_rows, decompress_rows),
+        migrations.RemoveField(
+            model_name='dataset',
+            name='data',
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:44
+
+import json
+import math
+import zlib
+
+import numpy as np
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of the payload decoder (format 1) and of the running stats
+# as this migration wrote them: sums plus log-bucketed quantile sketches
+# with 1% relative accuracy. Later changes to equipment.storage,
+# equipment.aggregates or equipment.sketches cannot change what it writes.
+NUMERIC_FIELDS = ('flowrate', 'pressure', 'temperature')
+SKETCH_ACCURACY = 0.01
+
+
+def decode_columns(payload):
+    if not payload:
+        return {field: [] for field in NUMERIC_FIELDS}
+    return json.loads(zlib.decompress(bytes(payload)))['columns']
+
+
+def _bucket_counts(values, log_gamma):
+    if not values.size:
+        return {}
+    keys, counts = np.unique(np.ceil(np.log(values) / log_gamma).astype('int64'), return_counts=True)
+    return {str(key): count for key, count in zip(keys.tolist(), counts.tolist())}
+
+
+def sketch_dict(values):
+    log_gamma = math.log((1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY))
+    values = values[np.isfinite(values)]
+    return {
+        'a': SKETCH_ACCURACY,
+        'pos': _bucket_counts(values[values > 0], log_gamma),
+        'neg': _bucket_counts(-values[values < 0], log_gamma),
+        'zero': int(np.count_nonzero(values == 0)),
+    }
+
+
+def build_running_stats(columns):
+    sums = {}
+    sketches = {}
+    for field in NUMERIC_FIELDS:
+        values = np.asarray(columns[field], dtype='float64')
+        sums[field] = float(np.nansum(values))
+        sketches[field] = sketch_dict(values)
+    return {'sums': sums, 'sketches': sketches}
+
+
+def backfill_running_stats(apps, schema_editor):
+    Dataset = apps.get_model('equipment', 'Dataset')
+    for dataset in Dataset.objects.iterator(chunk_size=100):
+        dataset.running_stats = build_running_stats(decode_columns(dataset.payload))
+        dataset.save(update_fields=['running_stats'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0003_dataset_compressed_payload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='base_revision',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='overlay_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='revision',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dataset',
+            name='running_stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.CreateModel(
+            name='DatasetRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('equipment_name', models.CharField(max_length=255)),
+                ('type', models.CharField(max_length=255)),
+                ('flowrate', models.FloatField()),
+                ('pressure', models.FloatField()),
+                ('temperature', models.FloatField()),
+                ('dataset', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overlay', to='equipment.dataset')),
+            ],
+            options={
+                'verbose_name': 'Upserted Row',
+                'verbose_name_plural': 'Upserted Rows',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='datasetrow',
+            constraint=models.UniqueConstraint(fields=('dataset', 'equipment_name'), name='unique_dataset_row_name'),
+        ),
+        migrations.RunPython(backfill_running_stats, migrations.RunPython.noop),
+    ]
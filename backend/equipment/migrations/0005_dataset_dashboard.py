@@ -0,0 +1,102 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:51
+
+import math
+
+from django.db import migrations, models
+
+# Frozen copy of the dashboard payload as this migration wrote it, with the
+# percentiles read from the stored quantile sketches (0004's format), so
+# later changes to equipment.dashboard or equipment.aggregates cannot change
+# what it writes.
+NUMERIC_FIELDS = ('flowrate', 'pressure', 'temperature')
+PERCENTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+
+def sketch_quantile(sketch, q):
+    gamma = (1 + sketch.get('a', 0.01)) / (1 - sketch.get('a', 0.01))
+    positive = {int(k): v for k, v in sketch.get('pos', {}).items()}
+    negative = {int(k): v for k, v in sketch.get('neg', {}).items()}
+    zero = sketch.get('zero', 0)
+    total = zero + sum(positive.values()) + sum(negative.values())
+    if not total:
+        return None
+
+    def value(key):
+        return 2 * gamma ** key / (gamma + 1)
+
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(negative, reverse=True):
+        seen += negative[key]
+        if seen > rank:
+            return -value(key)
+    seen += zero
+    if seen > rank:
+        return 0.0
+    for key in sorted(positive):
+        seen += positive[key]
+        if seen > rank:
+            return value(key)
+    return value(max(positive)) if positive else 0.0
+
+
+def percentiles(running_stats):
+    sketches = (running_stats or {}).get('sketches', {})
+    result = {}
+    for field in NUMERIC_FIELDS:
+        if field not in sketches:
+            continue
+        values = {name: sketch_quantile(sketches[field], q) for name, q in PERCENTILES.items()}
+        result[field] = {name: (round(v, 6) if v is not None and math.isfinite(v) else None)
+                         for name, v in values.items()}
+    return result
+
+
+def build_dashboard(dataset):
+    count = dataset.total_count
+    sums = (dataset.running_stats or {}).get('sums', {})
+    total_flowrate = sums.get('flowrate', dataset.avg_flowrate * count)
+    distribution = dataset.type_distribution or {}
+    composition = sorted(distribution.items(), key=lambda item: (-item[1], item[0]))
+    return {
+        "id": dataset.id,
+        "filename": dataset.filename,
+        "timestamp": dataset.uploaded_at.isoformat(),
+        "revision": dataset.revision,
+        "summary": {
+            "total_count": count,
+            "avg_flowrate": dataset.avg_flowrate,
+            "avg_pressure": dataset.avg_pressure,
+            "avg_temperature": dataset.avg_temperature,
+            "total_flowrate": total_flowrate,
+            "type_distribution": distribution,
+        },
+        "type_composition": [
+            {"type": eq_type, "count": n, "share": round(n / count, 4) if count else 0.0}
+            for eq_type, n in composition
+        ],
+        "percentiles": percentiles(dataset.running_stats),
+    }
+
+
+def backfill_dashboards(apps, schema_editor):
+    Dataset = apps.get_model('equipment', 'Dataset')
+    for dataset in Dataset.objects.defer('payload').iterator(chunk_size=100):
+        dataset.dashboard = build_dashboard(dataset)
+        dataset.save(update_fields=['dashboard'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0004_dataset_row_upserts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='dashboard',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_dashboards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipment', '0005_dataset_dashboard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataset',
+            name='anomaly_baseline',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='datasetrow',
+            name='anomaly_flags',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='datasetrow',
+            name='anomaly_score',
+            field=models.FloatField(default=0.0),
+        ),
+    ]
@@ -1,19 +1,31 @@
 """
 Equipment App - Database Models
-Stores uploaded datasets with history management (last 5 datasets).
+Stores uploaded datasets with configurable history retention, plus rows
+upserted into a dataset after upload.
 """
-from django.db import models
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import F, Sum, Window
 from django.utils import timezone
 
+from .dashboard import invalidate_dashboards
+from .storage import (
+    ANOMALY_FIELDS, ROW_FIELDS, encode_columns, encode_rows, decode_columns, row_fields, rows_from_columns,
+)
+
 
 class Dataset(models.Model):
     """
     Model to store uploaded equipment datasets.
-    Maintains history of last 5 uploads with summary statistics.
+    Maintains upload history with summary statistics; retention is set by
+    settings.EQUIPMENT_RETENTION.
     """
     id = models.CharField(max_length=100, primary_key=True)
-    filename = models.CharField(max_length=255)
-    uploaded_at = models.DateTimeField(default=timezone.now)
+    filename = models.CharField(max_length=255, db_index=True)
+    uploaded_at = models.DateTimeField(default=timezone.now, db_index=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)
     
     # Summary statistics stored as JSON
     total_count = models.IntegerField()
@@ -22,8 +34,28 @@ class Dataset(models.Model):
     avg_temperature = models.FloatField()
     type_distribution = models.JSONField()
     
-    # Full dataset stored as JSON
-    data = models.JSONField()
+    # Full dataset stored as compressed columnar bytes (see storage.py)
+    payload = models.BinaryField()
+    payload_size = models.IntegerField(default=0)  # compressed bytes
+    raw_size = models.IntegerField(default=0)      # uncompressed bytes
+
+    # Incremental updates: running sums and quantile sketches (see aggregates.py),
+    # a revision bumped on every change, and the count of upserted rows held in
+    # DatasetRow until they are compacted into the payload
+    running_stats = models.JSONField(default=dict, blank=True)
+    revision = models.IntegerField(default=0)
+    base_revision = models.IntegerField(default=0)  # revision the payload was last written at
+    overlay_rows = models.IntegerField(default=0)
+
+    # Pre-shaped dashboard payload, rebuilt on every write (see dashboard.py)
+    dashboard = models.JSONField(default=dict, blank=True)
+
+    # Per-type anomaly baseline from ingest (see anomalies.py); empty when the
+    # detection stage did not run
+    anomaly_baseline = models.JSONField(default=dict, blank=True)
+
+    # Heavy columns skipped by list queries (history metadata, admin list, pruning)
+    LIST_DEFERRED_FIELDS = ('payload', 'type_distribution', 'running_stats', 'dashboard', 'anomaly_baseline')
     
     class Meta:
         ordering = ['-uploaded_at']
@@ -32,15 +64,168 @@ class Dataset(models.Model):
     
     def __str__(self):
         return f"{self.filename} ({self.uploaded_at.strftime('%Y-%m-%d %H:%M')})"
+
+    def columns(self):
+        """
+        Current rows as a dict of column lists: the stored payload with any
+        upserted rows applied. Cached on the instance.
+        """
+        if getattr(self, '_columns_cache', None) is None:
+            columns = decode_columns(self.payload)
+            if self.overlay_rows:
+                overlay = getattr(self, '_overlay_cache', None)
+                if overlay is None:
+                    overlay = self.overlay.order_by('id').values_list(*OVERLAY_FIELDS)
+                columns = merge_overlay(columns, overlay)
+            self._columns_cache = columns
+        return self._columns_cache
+
+    async def aprefetch_overlay(self):
+        """
+        Load upserted rows with the async ORM, so columns() and data need no
+        further queries when they run in a worker thread.
+        """
+        if self.overlay_rows:
+            self._overlay_cache = [row async for row in self.overlay.order_by('id').values_list(*OVERLAY_FIELDS)]
+
+    @classmethod
+    def prefetch_overlays(cls, datasets):
+        """
+        Load upserted rows for several datasets in one query (none if no
+        dataset has any), so data access does not query per dataset.
+        """
+        pending = {d.id: d for d in datasets if d.overlay_rows}
+        if not pending:
+            return
+        for dataset in pending.values():
+            dataset._overlay_cache = []
+        rows = DatasetRow.objects.filter(dataset_id__in=list(pending)).order_by('id')
+        for row in rows.values_list('dataset_id', *OVERLAY_FIELDS):
+            pending[row[0]]._overlay_cache.append(row[1:])
+
+    @property
+    def data(self):
+        """
+        Row records, decompressed on first access and cached on the instance.
+        """
+        if getattr(self, '_data_cache', None) is None:
+            self._data_cache = rows_from_columns(self.columns())
+        return self._data_cache
+
+    @data.setter
+    def data(self, rows):
+        self.payload, self.raw_size = encode_rows(rows)
+        self.payload_size = len(self.payload)
+        self._data_cache = list(rows)
+        self._columns_cache = None
+
+    def set_columns(self, columns):
+        """
+        Store rows given as column lists; skips the per-row gather that
+        assigning `data` does.
+        """
+        self.payload, self.raw_size = encode_columns(columns)
+        self.payload_size = len(self.payload)
+        self._columns_cache = columns
+        self._data_cache = None
     
     @classmethod
-    def maintain_history_limit(cls):
+    def maintain_history_limit(cls, keep_id=None):
         """
-        Keep only the last 5 datasets, delete older ones.
+        Apply the retention policy: keep at most MAX_COUNT datasets, none
+        older than MAX_AGE_DAYS, and at most MAX_TOTAL_BYTES of payloads.
+        A limit of 0 disables that rule. The newest datasets are kept first.
+        `keep_id` (the dataset just uploaded) is never pruned, even when its
+        payload alone exceeds MAX_TOTAL_BYTES.
         """
-        datasets = cls.objects.all()
-        if datasets.count() > 5:
-            # Delete all except the 5 most recent
-            to_delete = datasets[5:]
-            for dataset in to_delete:
-                dataset.delete()
+        policy = settings.EQUIPMENT_RETENTION
+        max_count = policy.get('MAX_COUNT') or 0
+        max_age_days = policy.get('MAX_AGE_DAYS') or 0
+        max_total_bytes = policy.get('MAX_TOTAL_BYTES') or 0
+
+        # Only ids of datasets to delete are read, never payloads
+        stale_ids = set()
+        if max_count:
+            stale_ids.update(cls.objects.values_list('id', flat=True)[max_count:])
+        if max_total_bytes:
+            # Running total of payload sizes, newest first, in the database
+            running = Window(Sum('payload_size'), order_by=[F('uploaded_at').desc(), F('id').desc()])
+            stale_ids.update(
+                cls.objects.annotate(running_bytes=running)
+                .filter(running_bytes__gt=max_total_bytes)
+                .values_list('id', flat=True)
+            )
+        if max_age_days:
+            cutoff = timezone.now() - timedelta(days=max_age_days)
+            stale_ids.update(cls.objects.filter(uploaded_at__lt=cutoff).values_list('id', flat=True))
+
+        stale_ids.discard(keep_id)
+        if stale_ids:
+            stale_ids = list(stale_ids)
+            with transaction.atomic(savepoint=False):
+                # The collector fetches only the ids, then deletes upserted
+                # rows and datasets in one statement each
+                cls.objects.filter(id__in=stale_ids).only('id').delete()
+                transaction.on_commit(lambda: invalidate_dashboards(stale_ids))
+
+
+# Fields read from DatasetRow when merging upserted rows
+OVERLAY_FIELDS = ROW_FIELDS + ANOMALY_FIELDS
+
+
+class DatasetRow(models.Model):
+    """
+    A row upserted into a dataset after upload, keyed by equipment name.
+    Overrides any payload rows with the same name until compaction folds it
+    into the dataset's payload.
+    """
+    dataset = models.ForeignKey(Dataset, on_delete=models.CASCADE, related_name='overlay')
+    equipment_name = models.CharField(max_length=255)
+    type = models.CharField(max_length=255)
+    flowrate = models.FloatField()
+    pressure = models.FloatField()
+    temperature = models.FloatField()
+    anomaly_score = models.FloatField(default=0.0)
+    anomaly_flags = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'equipment_name'], name='unique_dataset_row_name'),
+        ]
+        verbose_name = 'Upserted Row'
+        verbose_name_plural = 'Upserted Rows'
+
+    def __str__(self):
+        return f"{self.equipment_name} ({self.dataset_id})"
+
+
+def merge_overlay(columns, overlay_rows):
+    """
+    Apply upserted rows (tuples in OVERLAY_FIELDS order) to payload columns.
+    A name already present replaces its first payload row and drops any
+    duplicates; new names are appended in upsert order.
+    """
+    fields = row_fields(columns)
+    positions = {}
+    duplicates = set()
+    for i, name in enumerate(columns['equipment_name']):
+        if name in positions:
+            duplicates.add(i)
+        else:
+            positions[name] = i
+    merged = {field: list(columns[field]) for field in fields}
+    replaced_names = set()
+    for values in overlay_rows:
+        row = dict(zip(OVERLAY_FIELDS, values))
+        index = positions.get(row['equipment_name'])
+        if index is None:
+            for field in fields:
+                merged[field].append(row[field])
+        else:
+            replaced_names.add(row['equipment_name'])
+            for field in fields:
+                merged[field][index] = row[field]
+    drop = {i for i in duplicates if columns['equipment_name'][i] in replaced_names}
+    if drop:
+        merged = {field: [v for i, v in enumerate(values) if i not in drop] for field, values in merged.items()}
+    return merged
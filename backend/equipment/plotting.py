@@ -0,0 +1,109 @@
+"""
+Equipment App - Chart Drawing
+The report charts, drawn from column arrays ({field: sequence}, snake_case
+as in storage) onto matplotlib axes. Drawing cost does not grow with the
+row count: large datasets get a flowrate histogram instead of one bar per
+unit, and the scatter plots a fixed-size sample in a single call.
+
+Shared by the API's PDF reports (equipment.charts) and the desktop client
+(report_charts), which only adapt their data and cache the images.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+
+PALETTE = ['#3b82f6', '#10b981', '#f59e0b', '#8b5cf6', '#ef4444', '#06b6d4', '#ec4899']
+
+# Chart specs: name -> (title, figure size in inches)
+CHART_SPECS = {
+    'type_distribution': ("Asset Type Composition", (6, 4)),
+    'flowrate': ("Flowrate by Equipment Unit", (7, 3.5)),
+    'pressure_temperature': ("Pressure vs Temperature Correlation", (6, 4)),
+}
+
+# Up to this many units get one labelled bar each; beyond it, a histogram
+MAX_UNIT_BARS = 40
+FLOWRATE_BINS = 40
+
+# Scatter points drawn at most; larger datasets are sampled (fixed seed)
+MAX_SCATTER_POINTS = 5000
+
+
+def draw_type_distribution(ax, type_distribution, columns):
+    ax.pie(list(type_distribution.values()), labels=list(type_distribution.keys()), autopct='%1.1f%%',
+           startangle=140, colors=PALETTE, textprops={'fontsize': 7})
+    ax.axis('equal')
+
+
+def draw_flowrate(ax, type_distribution, columns):
+    flowrate = np.asarray(columns['flowrate'], dtype='float64')
+    if len(flowrate) <= MAX_UNIT_BARS:
+        ax.bar(range(len(flowrate)), flowrate, color=PALETTE[0])
+        ax.set_xticks(range(len(flowrate)))
+        ax.set_xticklabels([str(name) for name in columns['equipment_name']], rotation=45, ha='right', fontsize=6)
+        ax.set_ylabel("m³/h", fontsize=7)
+    else:
+        counts, edges = np.histogram(flowrate[np.isfinite(flowrate)], bins=FLOWRATE_BINS)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge', color=PALETTE[0])
+        ax.set_xlabel("Flowrate (m³/h)", fontsize=7)
+        ax.set_ylabel("Units", fontsize=7)
+        ax.tick_params(axis='x', labelsize=7)
+        # Replaces the spec title, which describes the per-unit bars
+        return f"Flowrate Distribution ({len(flowrate):,} units)"
+    ax.tick_params(axis='y', labelsize=7)
+
+
+def draw_pressure_temperature(ax, type_distribution, columns):
+    codes, types = pd.factorize(pd.Series(columns['type'], dtype=object), sort=True)
+    pressure = np.asarray(columns['pressure'], dtype='float64')
+    temperature = np.asarray(columns['temperature'], dtype='float64')
+    if len(codes) > MAX_SCATTER_POINTS:
+        sample = np.sort(np.random.default_rng(0).choice(len(codes), MAX_SCATTER_POINTS, replace=False))
+        codes, pressure, temperature = codes[sample], pressure[sample], temperature[sample]
+
+    # One scatter call with a colour per point; the legend uses proxy markers
+    colors = np.array(PALETTE, dtype=object)[codes % len(PALETTE)]
+    ax.scatter(pressure, temperature, s=14 if len(codes) <= 1000 else 4, c=list(colors))
+    ax.set_xlabel("Pressure (bar)", fontsize=7)
+    ax.set_ylabel("Temperature (°C)", fontsize=7)
+    ax.tick_params(labelsize=7)
+    if len(types):
+        handles = [Line2D([], [], marker='o', linestyle='', color=PALETTE[i % len(PALETTE)], label=str(t))
+                   for i, t in enumerate(types)]
+        ax.legend(handles=handles, fontsize=6, loc='best')
+
+
+_DRAWERS = {
+    'type_distribution': draw_type_distribution,
+    'flowrate': draw_flowrate,
+    'pressure_temperature': draw_pressure_temperature,
+}
+
+
+def draw_chart(ax, chart, type_distribution, columns):
+    """
+    Draw one chart onto existing axes (e.g. the dashboard's Qt figure),
+    including its title.
+    """
+    title = _DRAWERS[chart](ax, type_distribution, columns)
+    ax.set_title(title or CHART_SPECS[chart][0], fontsize=9, fontweight='bold')
+
+
+def render_chart(chart, type_distribution, columns, fmt='png', dpi=110):
+    """
+    Render one chart to an in-memory image and return its bytes.
+    Uses a standalone Agg canvas, so it is safe outside the main thread.
+    """
+    _, figsize = CHART_SPECS[chart]
+    fig = Figure(figsize=figsize, dpi=dpi, facecolor='white')
+    FigureCanvasAgg(fig)
+    draw_chart(fig.add_subplot(111), chart, type_distribution, columns)
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt)
+    return buffer.getvalue()
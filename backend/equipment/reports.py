@@ -0,0 +1,107 @@
+"""
+Equipment App - PDF Reports
+Builds the equipment report for a dataset.
+"""
+import io
+from datetime import datetime
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
+from reportlab.lib.units import inch
+
+from .charts import get_chart
+from .plotting import CHART_SPECS
+from .instrumentation import span
+
+
+def build_dataset_report(dataset):
+    """
+    Render the PDF report for a dataset and return its bytes.
+    """
+    # Create PDF
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    styles = getSampleStyleSheet()
+
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1e293b'),
+        spaceAfter=30,
+    )
+    title = Paragraph("ChemEquip Visualizer - Equipment Report", title_style)
+    elements.append(title)
+
+    # Metadata
+    meta_style = styles['Normal']
+    elements.append(Paragraph(f"<b>Dataset:</b> {dataset.filename}", meta_style))
+    elements.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", meta_style))
+    elements.append(Paragraph(f"<b>Total Equipment:</b> {dataset.total_count}", meta_style))
+    elements.append(Spacer(1, 0.3 * inch))
+
+    # Summary Statistics
+    elements.append(Paragraph("<b>Summary Statistics</b>", styles['Heading2']))
+    summary_data = [
+        ['Metric', 'Value'],
+        ['Average Flowrate', f"{dataset.avg_flowrate:.2f} m³/h"],
+        ['Average Pressure', f"{dataset.avg_pressure:.2f} bar"],
+        ['Average Temperature', f"{dataset.avg_temperature:.2f} °C"],
+    ]
+    summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    elements.append(summary_table)
+    elements.append(Spacer(1, 0.3 * inch))
+
+    # Equipment Data Table
+    elements.append(Paragraph("<b>Equipment Details</b>", styles['Heading2']))
+    table_data = [['Equipment', 'Type', 'Flow (m³/h)', 'Pressure (bar)', 'Temp (°C)']]
+    for item in dataset.data[:20]:  # Limit to first 20 for PDF
+        table_data.append([
+            item['equipment_name'],
+            item['type'],
+            f"{item['flowrate']:.2f}",
+            f"{item['pressure']:.2f}",
+            f"{item['temperature']:.2f}"
+        ])
+
+    data_table = Table(table_data, colWidths=[1.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch])
+    data_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ]))
+    elements.append(data_table)
+
+    # Charts (rendered off-screen, reused across exports via the chart cache)
+    elements.append(PageBreak())
+    elements.append(Paragraph("<b>Visual Analytics</b>", styles['Heading2']))
+    with span('charts'):
+        for chart, (_, (width, height)) in CHART_SPECS.items():
+            scale = min(1.0, 6.5 / width)
+            elements.append(Image(io.BytesIO(get_chart(dataset, chart)), width=width * scale * inch, height=height * scale * inch))
+            elements.append(Spacer(1, 0.2 * inch))
+
+    # Build PDF
+    with span('pdf_build'):
+        doc.build(elements)
+    return buffer.getvalue()
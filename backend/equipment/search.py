@@ -0,0 +1,400 @@
+"""
+Equipment App - Equipment Name Search
+Typeahead search over equipment names across all retained datasets.
+
+Each retained dataset has an in-process NameIndex for its current
+revision: the distinct (name, type) pairs sorted by case-folded name, so a
+prefix is a binary search. Word-start keys ("pump" -> "Main Pump 3") and a
+trigram index for typo-tolerant matches are built on first use.
+
+The cache holds one index per retained dataset, so its size follows the
+retention policy and a search never evicts another dataset's index.
+Uploads and upserts rebuild the index in the background once committed;
+every search drops indexes of datasets that have since been pruned. Other
+processes build an index from the stored payload on their first search.
+"""
+import logging
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from django.db import connection
+
+from .executor import get_executor
+from .models import Dataset
+
+MATCH_EXACT = 'exact'
+MATCH_PREFIX = 'prefix'
+MATCH_WORD = 'word'
+MATCH_FUZZY = 'fuzzy'
+_MATCH_RANK = {MATCH_EXACT: 0, MATCH_PREFIX: 1, MATCH_WORD: 2, MATCH_FUZZY: 3}
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Share of the query's trigrams a fuzzy match must contain, and the
+# shortest query that falls back to fuzzy matching
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MIN_QUERY = 3
+
+# Names are cut to this many UTF-8 bytes for trigrams; keys are encoded in
+# chunks to bound the temporary byte matrix
+TRIGRAM_WIDTH = 32
+_TRIGRAM_CHUNK = 65536
+
+# Payloads fetched per round trip when indexes are built on a cold process
+PAYLOAD_CHUNK = 8
+
+
+logger = logging.getLogger(__name__)
+
+_WORD_START = re.compile(r'[\s\-_./:#()]+(?=\S)')
+
+# Per-process cache of name indexes: dataset id -> (revision, NameIndex)
+_index_lock = threading.Lock()
+_index_cache = {}
+_reindex_pending = set()
+
+
+def normalize(text):
+    return str(text).strip().casefold()
+
+
+class NameIndex:
+    """
+    Distinct (name, type) pairs of one dataset revision, sorted by key.
+    `positions` holds the first row index of each pair.
+    """
+
+    def __init__(self, names, types):
+        frame = pd.DataFrame({'name': names, 'type': types})
+        frame = frame.drop_duplicates(['name', 'type'])
+        frame['key'] = frame['name'].astype(str).str.strip().str.casefold()
+        frame = frame.sort_values('key', kind='stable')
+
+        self.keys = frame['key'].to_numpy(dtype=object)
+        self.names = frame['name'].to_numpy(dtype=object)
+        self.positions = frame.index.to_numpy()
+        self.type_codes, self.type_names = pd.factorize(frame['type'])
+        self.lengths = frame['key'].str.len().to_numpy()
+        self._lock = threading.Lock()
+        self._words = None
+        self._trigrams = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _of_types(self, entries, types):
+        # Boolean mask over entries for the given type names
+        wanted = [i for i, name in enumerate(self.type_names) if name in types]
+        return np.isin(self.type_codes[entries], wanted)
+
+    def _shortest(self, entries, limit):
+        # Shorter names first; entries are in key order, so ties stay alphabetical.
+        # A partition drops the long tail before sorting (short queries match a lot).
+        lengths = self.lengths[entries]
+        if len(entries) > limit:
+            keep = lengths <= np.partition(lengths, limit - 1)[limit - 1]
+            entries, lengths = entries[keep], lengths[keep]
+        order = np.argsort(lengths, kind='stable')
+        return entries[order[:limit]]
+
+    def prefix(self, key, types=None, limit=DEFAULT_LIMIT):
+        lo = np.searchsorted(self.keys, key, side='left')
+        hi = np.searchsorted(self.keys, key + '\U0010ffff', side='left')
+        entries = np.arange(lo, hi)
+        if types is not None:
+            entries = entries[self._of_types(entries, types)]
+        return self._shortest(entries, limit)
+
+    def _word_index(self):
+        # Keys from each word start after the first: "main pump 3" -> "pump 3", "3"
+        with self._lock:
+            if self._words is None:
+                keys = []
+                entries = []
+                for entry, key in enumerate(self.keys):
+                    for match in _WORD_START.finditer(key):
+                        keys.append(key[match.end():])
+                        entries.append(entry)
+                # sorted() beats np.argsort on object arrays by about 3x
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                self._words = (np.array(keys, dtype=object)[order], np.array(entries, dtype=np.int64)[order])
+            return self._words
+
+    def word_prefix(self, key, types=None, limit=DEFAULT_LIMIT):
+        keys, entries = self._word_index()
+        lo = np.searchsorted(keys, key, side='left')
+        hi = np.searchsorted(keys, key + '\U0010ffff', side='left')
+        entries = _distinct(np.sort(entries[lo:hi]))
+        if types is not None:
+            entries = entries[self._of_types(entries, types)]
+        return self._shortest(entries, limit)
+
+    def _trigram_index(self):
+        """
+        Inverted index trigram -> entries, as sorted arrays (CSR layout),
+        built with numpy over a fixed-width byte matrix of the keys.
+        """
+        with self._lock:
+            if self._trigrams is None:
+                chunks = [_trigram_pairs(self.keys[start:start + _TRIGRAM_CHUNK], start)
+                          for start in range(0, len(self.keys), _TRIGRAM_CHUNK)]
+                # One posting per (trigram, entry), sorted by trigram
+                pairs = _distinct(np.sort(np.concatenate(chunks))) if chunks else np.zeros(0, dtype=np.int64)
+                codes = (pairs >> 32).astype(np.int32)
+                postings = (pairs & 0xffffffff).astype(np.int32)
+                starts = np.flatnonzero(_first_of_run(codes))
+                trigrams = codes[starts]
+                self._trigrams = (trigrams, np.append(starts, len(codes)), postings)
+            return self._trigrams
+
+    def fuzzy(self, key, types=None, limit=DEFAULT_LIMIT):
+        """
+        Entries whose trigram similarity to `key` reaches
+        FUZZY_MIN_SIMILARITY, best first. Returns (entries, similarities).
+        """
+        trigrams, bounds, postings = self._trigram_index()
+        encoded = _padded(key)
+        wanted = np.array(sorted({(a << 16) | (b << 8) | c for a, b, c in zip(encoded, encoded[1:], encoded[2:])}))
+        if not len(trigrams):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        slots = np.searchsorted(trigrams, wanted)
+        slots = slots[(slots < len(trigrams)) & (trigrams[np.minimum(slots, len(trigrams) - 1)] == wanted)]
+        if not len(slots):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        candidates = np.sort(np.concatenate([postings[bounds[s]:bounds[s + 1]] for s in slots]))
+        starts = np.flatnonzero(_first_of_run(candidates))
+        entries = candidates[starts]
+        shared = np.diff(np.append(starts, len(candidates)))
+        # Share of the query's trigrams found in the name, so a short query
+        # still matches inside a long multi-word name
+        similarity = shared / len(wanted)
+        keep = similarity >= FUZZY_MIN_SIMILARITY
+        if types is not None:
+            keep &= self._of_types(entries, types)
+        entries, similarity = entries[keep], similarity[keep]
+        order = np.lexsort((self.lengths[entries], -similarity))[:limit]
+        return entries[order], similarity[order]
+
+    def search(self, query, types=None, limit=DEFAULT_LIMIT):
+        """
+        Ranked matches as (match, similarity, entry): exact and prefix
+        matches first, then word-start matches, then fuzzy matches to fill
+        the remaining slots.
+        """
+        key = normalize(query)
+        hits = []
+        seen = set()
+
+        def add(match, entries, similarities=None):
+            for i, entry in enumerate(entries.tolist()):
+                if entry not in seen and len(hits) < limit:
+                    seen.add(entry)
+                    similarity = 1.0 if similarities is None else float(similarities[i])
+                    hits.append((MATCH_EXACT if self.keys[entry] == key else match, similarity, entry))
+
+        add(MATCH_PREFIX, self.prefix(key, types, limit))
+        if len(hits) < limit:
+            add(MATCH_WORD, self.word_prefix(key, types, limit))
+        if len(hits) < limit and len(key) >= FUZZY_MIN_QUERY:
+            add(MATCH_FUZZY, *self.fuzzy(key, types, limit))
+        return hits
+
+    def warm(self):
+        """
+        Build the lazily built parts now, e.g. in a background thread.
+        """
+        self._word_index()
+        self._trigram_index()
+
+    def entry(self, entry):
+        return {
+            "equipment_name": str(self.names[entry]),
+            "type": str(self.type_names[self.type_codes[entry]]),
+            "index": int(self.positions[entry]),
+        }
+
+
+def _first_of_run(values):
+    # True where a sorted array starts a new run of equal values
+    mask = np.ones(len(values), dtype=bool)
+    mask[1:] = values[1:] != values[:-1]
+    return mask
+
+
+def _distinct(values):
+    # np.unique for an already sorted array, without re-sorting
+    return values[_first_of_run(values)]
+
+
+def _padded(key):
+    # Leading/trailing blanks give words their own start and end trigrams
+    return b' ' + key.encode('utf-8')[:TRIGRAM_WIDTH - 2] + b' '
+
+
+def _trigram_pairs(keys, offset):
+    """
+    (trigram << 32 | entry) for each trigram of each key, via a fixed-width
+    byte matrix of the padded keys.
+    """
+    encoded = [_padded(key) for key in keys]
+    width = max(len(e) for e in encoded)
+    matrix = np.frombuffer(b''.join(e.ljust(width, b'\0') for e in encoded), dtype=np.uint8)
+    matrix = matrix.reshape(len(encoded), width).astype(np.int64)
+    codes = (matrix[:, :-2] << 16) | (matrix[:, 1:-1] << 8) | matrix[:, 2:]
+    valid = np.arange(width - 2) < np.array([len(e) - 2 for e in encoded])[:, None]
+    entries = np.repeat(np.arange(offset, offset + len(encoded)), valid.sum(axis=1))
+    return (codes[valid] << 32) | entries
+
+
+def _cache_get(dataset_id, revision):
+    with _index_lock:
+        cached = _index_cache.get(dataset_id)
+    if cached is not None and cached[0] == revision:
+        return cached[1]
+    return None
+
+
+def _cache_put(dataset_id, revision, index):
+    with _index_lock:
+        cached = _index_cache.get(dataset_id)
+        # A slow build of an older revision must not replace a newer one
+        if cached is None or cached[0] <= revision:
+            _index_cache[dataset_id] = (revision, index)
+
+
+def _forget_pruned(live_ids):
+    # Drop indexes of datasets deleted since they were built
+    with _index_lock:
+        for dataset_id in [i for i in _index_cache if i not in live_ids]:
+            del _index_cache[dataset_id]
+
+
+def build_index(dataset_id, revision, columns, warm=False):
+    index = NameIndex(columns['equipment_name'], columns['type'])
+    if warm:
+        index.warm()
+    _cache_put(dataset_id, revision, index)
+    return index
+
+
+def schedule_index(dataset):
+    """
+    Build a freshly written dataset's index in the background from the
+    columns already in memory. Call after the write has committed.
+    """
+    columns = dataset.columns()
+    future = get_executor().submit(build_index, dataset.id, dataset.revision, columns, warm=True)
+    future.add_done_callback(_log_failure)
+
+
+def schedule_reindex(dataset_id):
+    """
+    Rebuild a dataset's index in the background after rows were upserted,
+    reading its payload and upserted rows on the worker thread. Call after
+    the write has committed. Only indexes this process already holds are
+    rebuilt, and upserts arriving while one rebuild is queued share it.
+    """
+    with _index_lock:
+        if dataset_id not in _index_cache or dataset_id in _reindex_pending:
+            return
+        _reindex_pending.add(dataset_id)
+    future = get_executor().submit(_reindex, dataset_id)
+    future.add_done_callback(_log_failure)
+
+
+def _reindex(dataset_id):
+    with _index_lock:
+        _reindex_pending.discard(dataset_id)
+    try:
+        dataset = Dataset.objects.only('id', 'payload', 'overlay_rows', 'revision').filter(id=dataset_id).first()
+        if dataset is not None and _cache_get(dataset.id, dataset.revision) is None:
+            build_index(dataset.id, dataset.revision, dataset.columns(), warm=True)
+    finally:
+        # Worker threads outlive the request; do not leave a connection open
+        connection.close()
+
+
+def _log_failure(future):
+    # A failed background build only costs a lazy build on the next search
+    if future.exception() is not None:
+        logger.error("Search index build failed", exc_info=future.exception())
+
+
+def _indexes(datasets):
+    """
+    {dataset id: NameIndex} for the given datasets. Cache misses load their
+    upserted rows in one query and stream their payloads in another, however
+    many miss; only PAYLOAD_CHUNK payloads and one decoded dataset are held
+    at a time.
+    """
+    indexes = {}
+    missing = {}
+    for dataset in datasets:
+        index = _cache_get(dataset.id, dataset.revision)
+        if index is None:
+            missing[dataset.id] = dataset
+        else:
+            indexes[dataset.id] = index
+    if missing:
+        Dataset.prefetch_overlays(missing.values())
+        payloads = Dataset.objects.filter(id__in=list(missing)).values_list('id', 'revision', 'payload')
+        for dataset_id, revision, payload in payloads.iterator(chunk_size=PAYLOAD_CHUNK):
+            dataset = missing[dataset_id]
+            dataset.payload, dataset.revision = payload, revision
+            indexes[dataset_id] = build_index(dataset_id, revision, dataset.columns())
+            # Listed instances outlive the loop; do not keep their rows
+            dataset.payload = dataset._columns_cache = dataset._overlay_cache = None
+    return indexes
+
+
+def search_equipment(query, types=None, dataset_ids=None, limit=DEFAULT_LIMIT):
+    """
+    Ranked equipment name matches across retained datasets. Ties go to
+    shorter names. A unit held by several datasets (e.g. daily snapshots)
+    is listed once, from the newest; `dataset_ids` lists all of them,
+    newest first.
+    """
+    # All retained datasets are listed (retention bounds them), so indexes
+    # of pruned datasets can be dropped whatever the filter
+    datasets = list(
+        Dataset.objects.only('id', 'filename', 'uploaded_at', 'revision', 'overlay_rows').order_by('-uploaded_at'))
+    _forget_pruned({dataset.id for dataset in datasets})
+    if dataset_ids:
+        wanted = set(dataset_ids)
+        datasets = [dataset for dataset in datasets if dataset.id in wanted]
+    indexes = _indexes(datasets)
+
+    ranked = []
+    for recency, dataset in enumerate(datasets):
+        index = indexes.get(dataset.id)
+        if index is None:
+            continue
+        for match, similarity, entry in index.search(query, types, limit):
+            ranked.append(((_MATCH_RANK[match], -similarity, index.lengths[entry], recency),
+                           dataset, index, match, similarity, entry))
+    ranked.sort(key=lambda item: item[0])
+
+    # A unit ranks the same in every dataset holding it, bar recency, so
+    # its first hit is the newest
+    units = {}
+    for _, dataset, index, match, similarity, entry in ranked:
+        unit = (index.keys[entry], index.type_names[index.type_codes[entry]])
+        result = units.get(unit)
+        if result is not None:
+            result["dataset_ids"].append(dataset.id)
+        elif len(units) < limit:
+            result = index.entry(entry)
+            result.update({
+                "dataset_id": dataset.id,
+                "dataset_ids": [dataset.id],
+                "filename": dataset.filename,
+                "timestamp": dataset.uploaded_at.isoformat(),
+                "match": match,
+                "score": round(similarity, 3),
+            })
+            units[unit] = result
+    return list(units.values())
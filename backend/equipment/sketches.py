@@ -0,0 +1,101 @@
+"""
+Equipment App - Quantile Sketches
+Log-bucketed quantile sketch (DDSketch-style) with a fixed relative error.
+Sketches are mergeable and, because they are plain bucket counts, values can
+also be removed again, which is what row upserts need.
+"""
+import math
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class QuantileSketch:
+    """
+    Counts values in logarithmic buckets. Any quantile estimate is within
+    `relative_accuracy` of the true value.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+
+    @property
+    def count(self):
+        return self.zero + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _update(self, values, sign):
+        values = np.asarray(values, dtype='float64')
+        values = values[np.isfinite(values)]
+        if not values.size:
+            return
+        self.zero += sign * int(np.count_nonzero(values == 0))
+        for store, part in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if not part.size:
+                continue
+            keys, counts = np.unique(np.ceil(np.log(part) / self._log_gamma).astype('int64'), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                remaining = store.get(key, 0) + sign * count
+                if remaining > 0:
+                    store[key] = remaining
+                else:
+                    store.pop(key, None)
+        self.zero = max(self.zero, 0)
+
+    def add(self, values):
+        self._update(values, 1)
+
+    def remove(self, values):
+        """
+        Remove previously added values (e.g. the old values of updated rows).
+        """
+        self._update(values, -1)
+
+    def merge(self, other):
+        for store, other_store in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_store.items():
+                store[key] = store.get(key, 0) + count
+        self.zero += other.zero
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantile(self, q):
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zero
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+    def to_dict(self):
+        return {
+            'a': self.relative_accuracy,
+            'pos': {str(k): v for k, v in self.positive.items()},
+            'neg': {str(k): v for k, v in self.negative.items()},
+            'zero': self.zero,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get('a', DEFAULT_RELATIVE_ACCURACY))
+        sketch.positive = {int(k): v for k, v in data.get('pos', {}).items()}
+        sketch.negative = {int(k): v for k, v in data.get('neg', {}).items()}
+        sketch.zero = data.get('zero', 0)
+        return sketch
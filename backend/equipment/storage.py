@@ -0,0 +1,65 @@
+"""
+Equipment App - Row Payload Storage
+Compact columnar encoding for dataset rows: one JSON array per column,
+zlib-compressed. Repeated type names and numeric columns compress far better
+laid out by column than as a list of row objects.
+"""
+import json
+import zlib
+
+ROW_FIELDS = ('equipment_name', 'type', 'flowrate', 'pressure', 'temperature')
+
+# Written by the anomaly detection stage; absent when it did not run
+ANOMALY_FIELDS = ('anomaly_score', 'anomaly_flags')
+
+PAYLOAD_FORMAT = 1
+COMPRESSION_LEVEL = 6
+
+
+def encode_columns(columns):
+    """
+    Encode a dict of column lists into compressed columnar bytes.
+    Returns (payload, raw_size) where raw_size is the uncompressed length.
+    """
+    columns = {field: columns[field] for field in row_fields(columns)}
+    raw = json.dumps({'v': PAYLOAD_FORMAT, 'columns': columns}, separators=(',', ':')).encode('utf-8')
+    return zlib.compress(raw, COMPRESSION_LEVEL), len(raw)
+
+
+def encode_rows(rows):
+    """
+    Encode a list of row dicts into compressed columnar bytes.
+    """
+    fields = ROW_FIELDS + tuple(f for f in ANOMALY_FIELDS if rows and f in rows[0])
+    return encode_columns({field: [row[field] for row in rows] for field in fields})
+
+
+def decode_columns(payload):
+    """
+    Decode compressed payload bytes into a dict of column lists.
+    """
+    if not payload:
+        return {field: [] for field in ROW_FIELDS}
+    return json.loads(zlib.decompress(bytes(payload)))['columns']
+
+
+def decode_rows(payload):
+    """
+    Decode compressed payload bytes back into a list of row dicts.
+    """
+    return rows_from_columns(decode_columns(payload))
+
+
+def rows_from_columns(columns, fields=ROW_FIELDS):
+    """
+    Row dicts from a dict of column lists. Anomaly fields are left out by
+    default; flagged rows are listed separately (see anomalies.anomaly_rows).
+    """
+    return [dict(zip(fields, values)) for values in zip(*(columns[field] for field in fields))]
+
+
+def row_fields(columns):
+    """
+    Fields present in decoded columns: ROW_FIELDS plus any anomaly fields.
+    """
+    return ROW_FIELDS + tuple(f for f in ANOMALY_FIELDS if f in columns)
@@ -0,0 +1,247 @@
+"""
+Equipment App - Synthetic Equipment Data
+Seeded generator of equipment tables for scale and regression testing:
+realistic type mixes and per-type value distributions, plus the mess real
+uploads carry (malformed cells, unit-suffixed values, duplicate names,
+outliers). Rows are produced in fixed-size chunks and streamed to disk, so
+a 10M-row file never sits in memory.
+
+The same seed and options always give the same rows, and a larger file
+starts with the rows of a smaller one.
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .exports import MAX_XLSX_ROWS, iter_xlsx
+from .storage import ROW_FIELDS
+from .validation import REQUIRED_COLUMNS
+
+GENERATE_CHUNK_ROWS = 100000
+FORMATS = ('csv', 'xlsx', 'parquet')
+
+# Shared by the backend perf suite and the desktop perf script
+DEFAULT_FIXTURES_DIR = os.path.join(tempfile.gettempdir(), 'equipment_fixtures')
+
+# type: (share of rows, name prefix, descriptors,
+#        flowrate m3/h (median, log sigma), pressure bar (mean, sd), temperature C (mean, sd))
+TYPE_PROFILES = {
+    'Pump': (0.24, 'P', ('Feed Pump', 'Transfer Pump', 'Centrifugal Pump', 'Booster Pump'),
+             (45.0, 0.35), (3.5, 0.6), (85.0, 12.0)),
+    'Valve': (0.20, 'V', ('Control Valve', 'Relief Valve', 'Gate Valve', 'Check Valve'),
+              (30.0, 0.5), (4.0, 1.2), (70.0, 15.0)),
+    'Heat Exchanger': (0.14, 'HX', ('Heat Exchanger', 'Condenser', 'Reboiler', 'Cooler'),
+                       (15.0, 0.4), (1.5, 0.3), (180.0, 25.0)),
+    'Tank': (0.12, 'TK', ('Storage Tank', 'Buffer Tank', 'Day Tank'),
+             (0.5, 1.0), (0.9, 0.1), (33.0, 4.0)),
+    'Reactor': (0.10, 'R', ('Reactor', 'CSTR', 'Batch Reactor'),
+                (35.0, 0.3), (8.5, 1.5), (245.0, 20.0)),
+    'Compressor': (0.08, 'C', ('Compressor', 'Blower', 'Recycle Compressor'),
+                   (25.0, 0.3), (12.5, 2.0), (145.0, 10.0)),
+    'Column': (0.07, 'T', ('Distillation Column', 'Absorber', 'Stripper'),
+               (150.0, 0.25), (5.8, 0.8), (195.0, 15.0)),
+    'Filter': (0.05, 'F', ('Filter Unit', 'Strainer', 'Cartridge Filter'),
+               (8.0, 0.3), (2.1, 0.3), (45.0, 6.0)),
+}
+
+# Cells the validator rejects
+MALFORMED_TEXT = ('', '   ')
+MALFORMED_NUMBERS = ('', 'N/A', '-', '#VALUE!', 'err', '1.2.3', '12,5', '7 furlongs')
+
+# Canonical value -> the same value with a unit suffix the validator converts back
+UNIT_VARIANTS = {
+    'Flowrate': lambda v: f"{v / 3.6:.4f} l/s",
+    'Pressure': lambda v: f"{v * 100:.2f} kPa",
+    'Temperature': lambda v: f"{v + 273.15:.2f} K",
+}
+
+DEFAULT_OPTIONS = {
+    'malformed_rate': 0.01,   # share of rows with one rejected cell
+    'duplicate_rate': 0.02,   # share of rows reusing an earlier name and type
+    'unit_rate': 0.01,        # share of numeric cells written with a unit suffix
+    'outlier_rate': 0.002,    # share of rows with one value far outside its type's range
+}
+
+
+def _chunk_rng(seed, chunk):
+    # One stream per chunk: any chunk can be generated without the ones before it
+    return np.random.default_rng([seed, chunk])
+
+
+def _values(rng, codes, profiles):
+    """
+    Canonical float values per numeric column for the given type codes.
+    """
+    n = len(codes)
+    flow = np.empty(n)
+    pressure = np.empty(n)
+    temperature = np.empty(n)
+    for code, (_, _, _, (median, sigma), (p_mean, p_sd), (t_mean, t_sd)) in enumerate(profiles):
+        rows = np.flatnonzero(codes == code)
+        flow[rows] = median * rng.lognormal(0.0, sigma, len(rows))
+        pressure[rows] = np.abs(rng.normal(p_mean, p_sd, len(rows)))
+        temperature[rows] = rng.normal(t_mean, t_sd, len(rows))
+    return {
+        'Flowrate': np.round(flow, 2),
+        'Pressure': np.round(pressure, 2),
+        'Temperature': np.round(temperature, 1),
+    }
+
+
+def _chunk(seed, chunk, start, rows, options, typed):
+    rng = _chunk_rng(seed, chunk)
+    types = list(TYPE_PROFILES)
+    profiles = list(TYPE_PROFILES.values())
+    weights = np.array([p[0] for p in profiles])
+    codes = rng.choice(len(types), size=rows, p=weights / weights.sum())
+
+    # Names are unique per global row index until duplicates are drawn
+    numbers = start + np.arange(rows) + 100
+    suffixes = rng.integers(0, 4, rows)
+    descriptors = rng.integers(0, 12, rows)
+    names = [
+        f"{profiles[c][1]}-{n}{'ABCD'[s]} {profiles[c][2][d % len(profiles[c][2])]}"
+        for c, n, s, d in zip(codes.tolist(), numbers.tolist(), suffixes.tolist(), descriptors.tolist())
+    ]
+    # Repeated readings of a unit: a later row takes an earlier row's name and type
+    duplicates = np.flatnonzero(rng.random(rows) < options['duplicate_rate'])
+    duplicates = duplicates[duplicates > 0]
+    sources = (rng.random(len(duplicates)) * duplicates).astype(np.int64)
+    for row, source in zip(duplicates.tolist(), sources.tolist()):
+        names[row] = names[source]
+    codes[duplicates] = codes[sources]
+
+    values = _values(rng, codes, profiles)
+    outliers = np.flatnonzero(rng.random(rows) < options['outlier_rate'])
+    outlier_columns = rng.integers(0, len(values), len(outliers))
+    for i, column in enumerate(values):
+        picked = outliers[outlier_columns == i]
+        values[column][picked] = np.round(values[column][picked] * rng.uniform(5.0, 10.0, len(picked)), 2)
+
+    frame = pd.DataFrame({
+        'Equipment Name': pd.Series(names, dtype=object),
+        'Type': pd.Series(np.array(types, dtype=object)[codes]),
+        **values,
+    }, columns=REQUIRED_COLUMNS)
+
+    # One rejected cell per malformed row, in a random column
+    malformed = np.flatnonzero(rng.random(rows) < options['malformed_rate'])
+    malformed_columns = rng.integers(0, len(REQUIRED_COLUMNS), len(malformed))
+    for i, column in enumerate(REQUIRED_COLUMNS):
+        picked = malformed[malformed_columns == i]
+        if not len(picked):
+            continue
+        if column in values and typed:
+            frame.loc[picked, column] = np.nan
+            continue
+        choices = MALFORMED_NUMBERS if column in values else MALFORMED_TEXT
+        bad = np.array(choices, dtype=object)[rng.integers(0, len(choices), len(picked))]
+        frame[column] = frame[column].astype(object)
+        frame.loc[picked, column] = bad
+
+    if not typed:
+        for column, variant in UNIT_VARIANTS.items():
+            picked = np.flatnonzero(rng.random(rows) < options['unit_rate'])
+            picked = np.setdiff1d(picked, malformed, assume_unique=True)
+            if len(picked):
+                frame[column] = frame[column].astype(object)
+                frame.loc[picked, column] = [variant(v) for v in values[column][picked].tolist()]
+    return frame
+
+
+def iter_frames(rows, seed=0, chunk_rows=GENERATE_CHUNK_ROWS, typed=False, **options):
+    """
+    Yield DataFrame chunks (upload schema headers, default RangeIndex per
+    chunk) adding up to `rows` rows. Options override DEFAULT_OPTIONS.
+
+    With `typed` the numeric columns stay float64 and malformed numeric
+    cells are NaN, for formats that store column types (Parquet); otherwise
+    malformed and unit-suffixed cells are written as text.
+    """
+    unknown = set(options) - set(DEFAULT_OPTIONS)
+    if unknown:
+        raise TypeError(f"Unknown options: {', '.join(sorted(unknown))}")
+    options = {**DEFAULT_OPTIONS, **options}
+    # Chunks are always drawn in full and the last one cut short, so the
+    # rows depend on neither the total nor how the caller slices them
+    for chunk, start in enumerate(range(0, rows, GENERATE_CHUNK_ROWS)):
+        frame = _chunk(seed, chunk, start, GENERATE_CHUNK_ROWS, options, typed)
+        frame = frame.iloc[:rows - start]
+        for offset in range(0, len(frame), chunk_rows):
+            yield frame.iloc[offset:offset + chunk_rows].reset_index(drop=True)
+
+
+def generate_frame(rows, seed=0, **options):
+    """
+    The whole table in memory; for small fixtures.
+    """
+    frames = list(iter_frames(rows, seed, **options))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+
+def format_for_path(path):
+    fmt = os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def write_dataset(path, rows, seed=0, fmt=None, **options):
+    """
+    Stream a generated table to `path` (format from the extension unless
+    given). Returns the number of bytes written.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+    if fmt == 'xlsx' and rows > MAX_XLSX_ROWS:
+        raise ValueError(f"XLSX holds at most {MAX_XLSX_ROWS} rows per sheet; use CSV or Parquet")
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            f.write(','.join(REQUIRED_COLUMNS) + '\n')
+            for frame in iter_frames(rows, seed, **options):
+                frame.to_csv(f, header=False, index=False)
+    elif fmt == 'xlsx':
+        chunks = (list(frame.itertuples(index=False, name=None)) for frame in iter_frames(rows, seed, **options))
+        with open(path, 'wb') as f:
+            for data in iter_xlsx(chunks, ROW_FIELDS):
+                f.write(data)
+    else:
+        _write_parquet(path, iter_frames(rows, seed, typed=True, **options))
+    return os.path.getsize(path)
+
+
+def _write_parquet(path, frames):
+    # One row group per chunk. Requires the optional pyarrow package.
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet output requires the pyarrow package")
+
+    schema = pa.schema([(column, pa.string()) for column in REQUIRED_COLUMNS[:2]] +
+                       [(column, pa.float64()) for column in REQUIRED_COLUMNS[2:]])
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in frames:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+
+
+def ensure_fixture(rows, seed=0, fmt='csv', directory=DEFAULT_FIXTURES_DIR):
+    """
+    Path of a cached fixture file, generated first if missing. Returns
+    (path, seconds spent generating, 0.0 when it was cached).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"equipment_{rows}_{seed}.{fmt}")
+    if os.path.exists(path):
+        return path, 0.0
+    start = time.perf_counter()
+    # Write then rename, so an interrupted run never leaves a partial fixture
+    partial = f"{path}.partial"
+    write_dataset(partial, rows, seed=seed, fmt=fmt)
+    os.replace(partial, path)
+    return path, time.perf_counter() - start
@@ -0,0 +1,277 @@
+"""
+Equipment App - Tests
+Each read endpoint issues a fixed number of queries however many datasets
+are retained, and answers within a coarse time bound; budgets are shared
+with `manage.py check_query_budget`. Row upserts keep the stored summary
+in step with the merged rows.
+
+Run: python manage.py test equipment
+"""
+import base64
+import json
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from . import deltas
+from .aggregates import build_running_stats
+from .dashboard import build_dashboard
+from .management.commands.check_query_budget import QUERY_BUDGETS, SAMPLE_ROWS
+from .models import Dataset
+
+SEEDED_DATASETS = 1000
+
+# Basic credentials are checked on every request: one user lookup
+AUTH_QUERIES = 1
+
+# Async endpoints, which check_query_budget cannot call
+ASYNC_QUERY_BUDGETS = {
+    'list': 1,
+    'rows': 1,
+}
+
+# Per request; generous, to catch a per-dataset loop rather than to benchmark
+TIME_BUDGET_SECONDS = 2.0
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class EndpointQueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        get_user_model().objects.create_user('budget', password='budget')
+        now = timezone.now()
+        Dataset.objects.bulk_create([
+            Dataset(
+                id=f"budget_{i}",
+                filename=f"budget_{i}.csv",
+                uploaded_at=now - timedelta(minutes=i + 1),
+                content_hash=f"{i:064x}",
+                total_count=len(SAMPLE_ROWS),
+                avg_flowrate=109.5,
+                avg_pressure=5.95,
+                avg_temperature=119.5,
+                type_distribution={'Pump': 7, 'Valve': 7, 'Reactor': 6},
+                data=SAMPLE_ROWS,
+            )
+            for i in range(SEEDED_DATASETS)
+        ], batch_size=500)
+
+    def setUp(self):
+        cache.clear()
+        credentials = base64.b64encode(b'budget:budget').decode()
+        self.authorization = f'Basic {credentials}'
+
+    def get(self, path, data=None):
+        """
+        GET through the test client, reading a streamed body to the end.
+        """
+        response = self.client.get(path, data, HTTP_AUTHORIZATION=self.authorization)
+        response.body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response
+
+    def async_get(self, path, data=None):
+        """
+        GET through the async client, for the async views. Runs on this
+        thread's event loop, so their queries use the test's connection.
+        """
+        async def fetch():
+            response = await self.async_client.get(path, data, headers={'Authorization': self.authorization})
+            response.body = b''.join([chunk async for chunk in response.streaming_content])
+            return response
+        return async_to_sync(fetch)()
+
+    def assertWithinBudget(self, budget, request, seconds=TIME_BUDGET_SECONDS):
+        """
+        Run request() and check its status, query count and duration.
+        """
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            response = request()
+            elapsed = time.perf_counter() - start
+        self.assertLess(response.status_code, 400, response.body)
+        self.assertLessEqual(
+            len(ctx.captured_queries), budget + AUTH_QUERIES,
+            "\n".join(q['sql'] for q in ctx.captured_queries),
+        )
+        if seconds is not None:
+            self.assertLess(elapsed, seconds)
+        return json.loads(response.body), response
+
+    def test_history(self):
+        data, _ = self.assertWithinBudget(QUERY_BUDGETS['history'], lambda: self.get('/api/history/'))
+        self.assertEqual(len(data), 5)
+        self.assertEqual(len(data[0]['data']), len(SAMPLE_ROWS))
+
+    def test_history_without_data(self):
+        data, _ = self.assertWithinBudget(
+            QUERY_BUDGETS['history_meta'], lambda: self.get('/api/history/', {'include_data': 'false', 'limit': 100}))
+        self.assertEqual(len(data), 100)
+
+    def test_dataset_list(self):
+        data, _ = self.assertWithinBudget(
+            ASYNC_QUERY_BUDGETS['list'], lambda: self.async_get('/api/datasets/', {'limit': 100}))
+        self.assertEqual(len(data), 100)
+
+    def test_dataset_detail(self):
+        data, _ = self.assertWithinBudget(
+            QUERY_BUDGETS['dashboard'], lambda: self.get('/api/datasets/budget_0/dashboard/'))
+        self.assertEqual(data['id'], 'budget_0')
+        # Served from the cache the second time
+        self.assertWithinBudget(0, lambda: self.get('/api/datasets/budget_0/dashboard/'))
+
+    def test_dataset_rows(self):
+        data, response = self.assertWithinBudget(
+            ASYNC_QUERY_BUDGETS['rows'], lambda: self.async_get('/api/datasets/budget_0/rows/', {'limit': 15}))
+        self.assertEqual(response['X-Total-Rows'], '15')
+        self.assertEqual(len(data), 15)
+
+    def test_repeated_search_reads_no_payloads(self):
+        # The first search builds an index per dataset, so it is not timed
+        self.assertWithinBudget(
+            QUERY_BUDGETS['search'], lambda: self.get('/api/search/', {'q': 'unit-1'}), seconds=None)
+        # Every index is cached now, so only the dataset listing runs
+        data, _ = self.assertWithinBudget(
+            QUERY_BUDGETS['search_repeat'], lambda: self.get('/api/search/', {'q': 'unit-1'}))
+        self.assertTrue(data['results'])
+        # Every seeded dataset holds the same units; each is listed once
+        units = [(result['equipment_name'], result['type']) for result in data['results']]
+        self.assertEqual(len(units), len(set(units)))
+        self.assertEqual(data['results'][0]['dataset_id'], 'budget_0')
+        self.assertEqual(len(data['results'][0]['dataset_ids']), SEEDED_DATASETS)
+
+
+def _frame(rows):
+    """
+    Validated-style frame (canonical columns) from (name, type, flowrate,
+    pressure, temperature) tuples.
+    """
+    return pd.DataFrame(rows, columns=['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UploadTestCase(TestCase):
+    """
+    Creates datasets through the upload endpoint, as clients do.
+    """
+
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_user('upsert', password='upsert')
+        credentials = base64.b64encode(b'upsert:upsert').decode()
+        self.authorization = f'Basic {credentials}'
+
+    def upload(self, rows):
+        body = "Equipment Name,Type,Flowrate,Pressure,Temperature\n" + "\n".join(
+            ",".join(str(value) for value in row) for row in rows)
+        response = self.client.post(
+            '/api/upload/', {'file': SimpleUploadedFile('upsert.csv', body.encode())},
+            HTTP_AUTHORIZATION=self.authorization)
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['id']
+
+
+class RetentionTests(UploadTestCase):
+
+    @override_settings(EQUIPMENT_RETENTION={'MAX_COUNT': 5, 'MAX_AGE_DAYS': 0, 'MAX_TOTAL_BYTES': 1})
+    def test_upload_larger_than_byte_limit_is_kept(self):
+        rows = [(f"P-{i}", 'Pump', 100 + i, 5.0, 110) for i in range(20)]
+        self.upload(rows)
+        dataset_id = self.upload(rows)
+        # The older dataset is pruned; the one just uploaded never is
+        self.assertEqual(list(Dataset.objects.values_list('id', flat=True)), [dataset_id])
+
+
+class DatasetUpsertTests(UploadTestCase):
+    """
+    Row upserts: stored summaries, dashboards and anomaly flags agree with
+    the merged rows, before and after compaction.
+    """
+
+    def assertSummaryMatchesRows(self, dataset):
+        """
+        The stored summary and dashboard equal a recompute from the rows.
+        """
+        columns = dataset.columns()
+        expected = build_running_stats(columns)
+        self.assertEqual(dataset.total_count, len(columns['equipment_name']))
+        self.assertEqual(dataset.type_distribution, dict(Counter(columns['type'])))
+        for field in ('flowrate', 'pressure', 'temperature'):
+            self.assertAlmostEqual(dataset.running_stats['sums'][field], expected['sums'][field])
+        self.assertEqual(dataset.running_stats['sketches'], expected['sketches'])
+        self.assertEqual(dataset.running_stats['anomalies'], expected['anomalies'])
+        self.assertEqual(dataset.dashboard, build_dashboard(dataset))
+
+    def test_dashboard_is_built_after_compaction(self):
+        dataset_id = self.upload(
+            [(f"P-{i}", 'Pump', 100 + i % 7, 5 + (i % 5) / 10, 110 + i % 3) for i in range(60)]
+            + [('P-hot', 'Pump', 400, 5.2, 111)])
+        # Well above the ingest baseline; compaction rescores against one
+        # that includes them, so the delta's flags do not survive it
+        delta = _frame([(f"N-{i}", 'Pump', 250.0 + i, 5.2, 111.0) for i in range(30)])
+        with mock.patch.object(deltas, 'COMPACT_MIN_ROWS', 10), mock.patch.object(deltas, 'COMPACT_RATIO', 0.1):
+            deltas.upsert_rows(dataset_id, delta)
+
+        dataset = Dataset.objects.get(id=dataset_id)
+        self.assertEqual(dataset.overlay_rows, 0)
+        flagged = int(np.count_nonzero(dataset.columns()['anomaly_flags']))
+        self.assertEqual(dataset.running_stats['anomalies'], flagged)
+        self.assertEqual(dataset.dashboard['summary']['anomaly_count'], flagged)
+        self.assertSummaryMatchesRows(dataset)
+
+    def test_upsert_over_duplicated_payload_name(self):
+        dataset_id = self.upload(
+            [(f"P-{i}", 'Pump', 100 + i, 5.0, 110) for i in range(10)] + [('P-3', 'Pump', 300, 6.0, 120)])
+        _, inserted, updated = deltas.upsert_rows(dataset_id, _frame([('P-3', 'Valve', 50.0, 2.0, 90.0)]))
+        self.assertEqual((inserted, updated), (0, 1))
+
+        # Both payload rows named P-3 give way to the one upserted row
+        dataset = Dataset.objects.get(id=dataset_id)
+        self.assertEqual(dataset.total_count, 10)
+        columns = dataset.columns()
+        position = columns['equipment_name'].index('P-3')
+        self.assertEqual(columns['equipment_name'].count('P-3'), 1)
+        self.assertEqual((columns['type'][position], columns['flowrate'][position]), ('Valve', 50.0))
+        self.assertSummaryMatchesRows(dataset)
+
+    def test_reupsert_of_overlay_row(self):
+        dataset_id = self.upload([(f"P-{i}", 'Pump', 100 + i, 5.0, 110) for i in range(10)])
+        _, inserted, updated = deltas.upsert_rows(dataset_id, _frame([('N-1', 'Tank', 10.0, 1.0, 20.0)]))
+        self.assertEqual((inserted, updated), (1, 0))
+        _, inserted, updated = deltas.upsert_rows(
+            dataset_id, _frame([('N-1', 'Filter', 12.0, 1.5, 25.0), ('P-0', 'Pump', 99.0, 5.0, 110.0)]))
+        self.assertEqual((inserted, updated), (0, 2))
+
+        dataset = Dataset.objects.get(id=dataset_id)
+        self.assertEqual(dataset.total_count, 11)
+        self.assertEqual(dataset.overlay.count(), 2)
+        self.assertEqual(dataset.type_distribution, {'Pump': 10, 'Filter': 1})
+        self.assertSummaryMatchesRows(dataset)
+
+    def test_summary_matches_recompute_after_compaction(self):
+        dataset_id = self.upload([(f"P-{i}", 'Pump', 100 + i, 5.0 + i / 10, 110) for i in range(40)])
+        deltas.upsert_rows(dataset_id, _frame([(f"P-{i}", 'Valve', 80.0, 4.0, 100.0) for i in range(0, 40, 4)]))
+        with mock.patch.object(deltas, 'COMPACT_MIN_ROWS', 5), mock.patch.object(deltas, 'COMPACT_RATIO', 0.1):
+            _, inserted, updated = deltas.upsert_rows(
+                dataset_id, _frame([(f"N-{i}", 'Tank', 20.0 + i, 1.0, 30.0) for i in range(8)]
+                                   + [('P-1', 'Pump', 0.0, -1.0, 105.0)]))
+        self.assertEqual((inserted, updated), (8, 1))
+
+        dataset = Dataset.objects.get(id=dataset_id)
+        self.assertEqual(dataset.overlay_rows, 0)
+        self.assertEqual(dataset.overlay.count(), 0)
+        self.assertEqual(dataset.base_revision, dataset.revision)
+        self.assertEqual(dataset.total_count, 48)
+        self.assertSummaryMatchesRows(dataset)
@@ -2,11 +2,22 @@
 Equipment App - URL Configuration
 """
 from django.urls import path
-from .views import EquipmentUploadView, DatasetHistoryView, GeneratePDFView, api_root
+from .views import (
+    EquipmentUploadView, DatasetHistoryView, GeneratePDFView, DatasetExportView, DatasetDashboardView,
+    EquipmentSearchView, MetricsView, api_root,
+)
+from .async_views import async_history, async_dataset_rows, async_dataset_report
 
 urlpatterns = [
     path('', api_root, name='api-root'),
     path('upload/', EquipmentUploadView.as_view(), name='equipment-upload'),
     path('history/', DatasetHistoryView.as_view(), name='dataset-history'),
     path('generate-pdf/', GeneratePDFView.as_view(), name='generate-pdf'),
+    path('search/', EquipmentSearchView.as_view(), name='equipment-search'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('datasets/', async_history, name='dataset-list'),
+    path('datasets/<str:dataset_id>/rows/', async_dataset_rows, name='dataset-rows'),
+    path('datasets/<str:dataset_id>/report/', async_dataset_report, name='dataset-report'),
+    path('datasets/<str:dataset_id>/export/', DatasetExportView.as_view(), name='dataset-export'),
+    path('datasets/<str:dataset_id>/dashboard/', DatasetDashboardView.as_view(), name='dataset-dashboard'),
 ]
@@ -0,0 +1,320 @@
+"""
+Equipment App - Ingestion Schema & Validation
+Typed parsing of equipment tables shared by the API upload and the desktop
+client. Column aliases and unit-suffixed values are resolved up front, dtypes
+are declared to the reader instead of inferred, and bad cells are collected
+as vectorized per-column masks into a structured report.
+"""
+import re
+
+import pandas as pd
+
+REQUIRED_COLUMNS = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
+TEXT_COLUMNS = ['Equipment Name', 'Type']
+NUMERIC_COLUMNS = ['Flowrate', 'Pressure', 'Temperature']
+
+# Normalized header -> canonical column
+COLUMN_ALIASES = {
+    'equipment name': 'Equipment Name',
+    'equipment': 'Equipment Name',
+    'equipment id': 'Equipment Name',
+    'name': 'Equipment Name',
+    'unit name': 'Equipment Name',
+    'tag': 'Equipment Name',
+    'type': 'Type',
+    'equipment type': 'Type',
+    'category': 'Type',
+    'flowrate': 'Flowrate',
+    'flow rate': 'Flowrate',
+    'flow': 'Flowrate',
+    'pressure': 'Pressure',
+    'press': 'Pressure',
+    'temperature': 'Temperature',
+    'temp': 'Temperature',
+}
+
+# Units the values are stored in
+CANONICAL_UNITS = {'Flowrate': 'm3/h', 'Pressure': 'bar', 'Temperature': 'C'}
+
+# Normalized unit -> converter to the canonical unit, per column
+UNIT_CONVERTERS = {
+    'Flowrate': {
+        'm3/h': lambda v: v,
+        'm3/hr': lambda v: v,
+        'm³/h': lambda v: v,
+        'l/s': lambda v: v * 3.6,
+        'l/min': lambda v: v * 0.06,
+        'l/h': lambda v: v / 1000.0,
+        'gpm': lambda v: v * 0.227124707,
+    },
+    'Pressure': {
+        'bar': lambda v: v,
+        'mbar': lambda v: v / 1000.0,
+        'kpa': lambda v: v / 100.0,
+        'mpa': lambda v: v * 10.0,
+        'pa': lambda v: v / 100000.0,
+        'psi': lambda v: v * 0.0689475729,
+        'atm': lambda v: v * 1.01325,
+    },
+    'Temperature': {
+        'c': lambda v: v,
+        '°c': lambda v: v,
+        'degc': lambda v: v,
+        'k': lambda v: v - 273.15,
+        'f': lambda v: (v - 32.0) * 5.0 / 9.0,
+        '°f': lambda v: (v - 32.0) * 5.0 / 9.0,
+        'degf': lambda v: (v - 32.0) * 5.0 / 9.0,
+    },
+}
+
+# A number optionally followed by a unit, e.g. "12.5 bar", "3e2kPa", "85°C"
+_VALUE_WITH_UNIT = r'^\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\s*([^\d\s].*?)?\s*$'
+_HEADER_UNIT = re.compile(r'^(.*?)\s*[\(\[]\s*(.+?)\s*[\)\]]\s*$')
+
+MAX_REPORTED_ERRORS = 100
+
+
+class SchemaError(ValueError):
+    """
+    The table is missing required columns or has no usable rows.
+    """
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+class ValidationResult:
+    """
+    Outcome of validating an equipment table.
+
+    `data` holds only the valid rows, with canonical column names, str text
+    columns and float64 numeric columns in canonical units. `report` is the
+    JSON-serializable summary of what was accepted and rejected.
+    """
+
+    def __init__(self, data, report):
+        self.data = data
+        self.report = report
+
+    @property
+    def invalid_rows(self):
+        return self.report['invalid_rows']
+
+
+def _normalize_unit(unit):
+    return unit.strip().lower().replace(' ', '').replace('^3', '3').replace('³', '3')
+
+
+def _normalize_header(header):
+    return re.sub(r'[\s_]+', ' ', str(header)).strip().lower()
+
+
+def resolve_columns(headers):
+    """
+    Map source headers to canonical columns.
+    Returns (mapping {source: canonical}, header_units {canonical: unit}, missing).
+    """
+    mapping = {}
+    header_units = {}
+    for header in headers:
+        normalized = _normalize_header(header)
+        unit = None
+        match = _HEADER_UNIT.match(normalized)
+        if match and match.group(1) in COLUMN_ALIASES:
+            normalized, unit = match.group(1), match.group(2)
+        canonical = COLUMN_ALIASES.get(normalized)
+        if canonical is None or canonical in mapping.values():
+            continue
+        mapping[header] = canonical
+        if unit and canonical in UNIT_CONVERTERS:
+            header_units[canonical] = _normalize_unit(unit)
+    missing = [col for col in REQUIRED_COLUMNS if col not in mapping.values()]
+    return mapping, header_units, missing
+
+
+def _parse_numeric(series, column, header_unit=None):
+    """
+    Vectorized numeric parse with unit suffixes.
+    Returns (float64 values in canonical units, error messages as a Series
+    indexed by the bad rows only). Infinite values ("inf", "1e999") are
+    rejected like any other non-number.
+    """
+    converters = UNIT_CONVERTERS[column]
+    default = converters.get(header_unit) if header_unit else None
+
+    if pd.api.types.is_float_dtype(series) or pd.api.types.is_integer_dtype(series):
+        values = series.astype('float64')
+        if default is not None:
+            values = default(values)
+        errors = [_messages(values.isna(), 'missing value')]
+        return values, pd.concat(errors + [_reject_infinite(values)]).sort_index()
+
+    text = series.astype('string').str.strip()
+    values = pd.to_numeric(text, errors='coerce').astype('float64')
+    if default is not None:
+        values = default(values)
+
+    missing = text.isna() | (text == '')
+    errors = [_messages(missing, 'missing value')]
+    pending = values.isna() & ~missing
+    if pending.any():
+        parts = text[pending].str.extract(_VALUE_WITH_UNIT)
+        numbers = pd.to_numeric(parts[0], errors='coerce')
+        units = parts[1].fillna('').map(_normalize_unit)
+        errors.append(_messages(numbers.isna(), 'not a number'))
+        for unit in units[numbers.notna()].unique():
+            rows = units.index[(units == unit) & numbers.notna()]
+            convert = converters.get(unit) if unit else default or (lambda v: v)
+            if convert is None:
+                errors.append(pd.Series(f"unknown unit '{unit}'", index=rows, dtype=object))
+            else:
+                values[rows] = convert(numbers[rows])
+    errors.append(_reject_infinite(values))
+    return values, pd.concat(errors).sort_index()
+
+
+def _reject_infinite(values):
+    # pd.to_numeric accepts "inf"/"-inf"; blank them out as not-a-number
+    infinite = values.abs() == float('inf')
+    values[infinite] = float('nan')
+    return _messages(infinite, 'not a number')
+
+
+def _messages(mask, message):
+    # Sparse error Series: only rows where mask is True
+    return pd.Series(message, index=mask.index[mask.to_numpy(dtype=bool, na_value=True)], dtype=object)
+
+
+def validate_frame(raw, mapping, header_units=None):
+    """
+    Validate a raw DataFrame whose columns have been resolved by
+    resolve_columns(). Returns a ValidationResult.
+    """
+    header_units = header_units or {}
+    frame = raw[list(mapping)].rename(columns=mapping)
+    total = len(frame)
+
+    errors = {}
+    clean = {}
+    for column in TEXT_COLUMNS:
+        text = frame[column].astype('string').str.strip()
+        errors[column] = _messages(text.isna() | (text == ''), 'missing value')
+        clean[column] = text
+    for column in NUMERIC_COLUMNS:
+        clean[column], errors[column] = _parse_numeric(frame[column], column, header_units.get(column))
+
+    bad_index = pd.Index([])
+    for column_errors in errors.values():
+        bad_index = bad_index.union(column_errors.index)
+
+    valid = pd.DataFrame(clean, columns=REQUIRED_COLUMNS)
+    if len(bad_index):
+        valid = valid.drop(index=bad_index).reset_index(drop=True)
+    for column in TEXT_COLUMNS:
+        valid[column] = valid[column].astype(str)
+
+    error_list = []
+    error_counts = {}
+    for column, bad in errors.items():
+        if bad.empty:
+            continue
+        error_counts[column] = int(len(bad))
+        for index, message in bad.head(MAX_REPORTED_ERRORS).items():
+            value = frame.at[index, column]
+            error_list.append({
+                "row": int(index) + 2,  # 1-based, after the header line
+                "column": column,
+                "value": None if pd.isna(value) else str(value),
+                "error": message,
+            })
+    error_list.sort(key=lambda e: (e['row'], REQUIRED_COLUMNS.index(e['column'])))
+
+    report = {
+        "total_rows": int(total),
+        "valid_rows": int(len(valid)),
+        "invalid_rows": int(len(bad_index)),
+        "column_mapping": {str(k): v for k, v in mapping.items()},
+        "units": {col: header_units.get(col, CANONICAL_UNITS[col]) for col in NUMERIC_COLUMNS},
+        "error_counts": error_counts,
+        "errors": error_list[:MAX_REPORTED_ERRORS],
+        "errors_truncated": len(error_list) > MAX_REPORTED_ERRORS or any(
+            n > MAX_REPORTED_ERRORS for n in error_counts.values()),
+    }
+    return ValidationResult(valid, report)
+
+
+def _schema_report(mapping, missing):
+    return {
+        "total_rows": 0,
+        "valid_rows": 0,
+        "invalid_rows": 0,
+        "column_mapping": {str(k): v for k, v in mapping.items()},
+        "missing_columns": missing,
+        "error_counts": {},
+        "errors": [],
+        "errors_truncated": False,
+    }
+
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def read_equipment_table(source, filename=None):
+    """
+    Read a CSV/XLSX/XLS equipment table from a path or file object with
+    declared dtypes. Returns (raw DataFrame, mapping, header_units) for
+    validate_frame(). Raises SchemaError when required columns are missing.
+    """
+    name = (filename or (source if isinstance(source, str) else getattr(source, 'name', '')) or '').lower()
+    is_excel = name.endswith(('.xlsx', '.xls'))
+
+    # Header first, so dtypes can be declared for the real read
+    if is_excel:
+        headers = list(pd.read_excel(source, nrows=0).columns)
+    else:
+        headers = list(pd.read_csv(source, nrows=0).columns)
+    _rewind(source)
+
+    mapping, header_units, missing = resolve_columns(headers)
+    if missing:
+        raise SchemaError(
+            f"Invalid schema. Required columns: {', '.join(REQUIRED_COLUMNS)}",
+            _schema_report(mapping, missing),
+        )
+
+    reverse = {canonical: source_col for source_col, canonical in mapping.items()}
+    text_dtypes = {reverse[col]: str for col in TEXT_COLUMNS}
+    if is_excel:
+        numeric_dtypes = {reverse[col]: object for col in NUMERIC_COLUMNS}
+        raw = pd.read_excel(source, usecols=list(mapping), dtype={**text_dtypes, **numeric_dtypes})
+    else:
+        try:
+            # Fast path: clean numeric columns parse straight to float64
+            numeric_dtypes = {reverse[col]: 'float64' for col in NUMERIC_COLUMNS}
+            raw = pd.read_csv(source, usecols=list(mapping), dtype={**text_dtypes, **numeric_dtypes})
+        except (ValueError, TypeError):
+            _rewind(source)
+            raw = pd.read_csv(source, usecols=list(mapping), dtype=str, keep_default_na=False)
+    return raw, mapping, header_units
+
+
+def load_equipment_table(source, filename=None):
+    """
+    Read and validate an equipment table. Raises SchemaError when required
+    columns are missing or no row is valid; otherwise returns a
+    ValidationResult.
+    """
+    raw, mapping, header_units = read_equipment_table(source, filename)
+    return check_result(validate_frame(raw, mapping, header_units))
+
+
+def check_result(result):
+    """
+    Raise SchemaError if a validation result has no usable rows.
+    """
+    if result.report['valid_rows'] == 0:
+        raise SchemaError("No valid rows found", result.report)
+    return result
@@ -5,20 +5,77 @@ REST API endpoints for CSV upload, dataset history, and PDF generation.
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, authentication
-from django.http import HttpResponse
-import pandas as pd
-import io
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+import hashlib
+import logging
+import secrets
 from datetime import datetime
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.units import inch
 
 from .models import Dataset
+from .aggregates import build_running_stats, percentiles
+from .anomalies import anomaly_rows, detect_anomalies
+from .dashboard import LATEST, build_dashboard, cache_dashboard, cached_dashboard, publish_dashboard
+from .validation import SchemaError, check_result, read_equipment_table, validate_frame
+from .exports import EXPORT_FORMATS, ExportError, parse_export_params, iter_export
+from .executor import run_cpu
+from .reports import build_dataset_report
+from .search import DEFAULT_LIMIT as SEARCH_DEFAULT_LIMIT, MAX_LIMIT as SEARCH_MAX_LIMIT, schedule_index, search_equipment
+from .storage import row_fields, rows_from_columns
+from .instrumentation import METRICS, span, record_rows, record_bytes
 
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
 
+logger = logging.getLogger(__name__)
+
+MAX_HISTORY_PAGE = 500
+
+SNAKE_CASE_COLUMNS = {
+    'Equipment Name': 'equipment_name',
+    'Type': 'type',
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+
+def parse_history_params(params):
+    """
+    Read ?include_data and ?limit from a history request's query string.
+    """
+    include_data = params.get('include_data', 'true').lower() not in ('false', '0', 'no')
+    try:
+        limit = max(1, min(int(params.get('limit', 5)), MAX_HISTORY_PAGE))
+    except ValueError:
+        limit = 5
+    return include_data, limit
+
+
+def serialize_dataset(dataset, include_data=True):
+    """
+    History entry for a dataset, as returned by the history endpoints.
+    """
+    entry = {
+        "id": dataset.id,
+        "filename": dataset.filename,
+        "timestamp": dataset.uploaded_at.isoformat(),
+        "summary": {
+            "total_count": dataset.total_count,
+            "avg_flowrate": dataset.avg_flowrate,
+            "avg_pressure": dataset.avg_pressure,
+            "avg_temperature": dataset.avg_temperature,
+            "type_distribution": dataset.type_distribution,
+            "percentiles": percentiles(dataset.running_stats),
+            "anomaly_count": (dataset.running_stats or {}).get('anomalies', 0)
+        }
+    }
+    if include_data:
+        entry["data"] = dataset.data
+        entry["anomalies"] = anomaly_rows(dataset.columns())
+    return entry
+
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([permissions.AllowAny])
@@ -32,7 +89,14 @@ def api_root(request):
         "endpoints": {
             "history": "/api/history/",
             "upload": "/api/upload/",
-            "generate_pdf": "/api/generate-pdf/"
+            "generate_pdf": "/api/generate-pdf/",
+            "metrics": "/api/metrics/",
+            "datasets": "/api/datasets/",
+            "dataset_rows": "/api/datasets/<id>/rows/ (GET rows, POST upsert)",
+            "dataset_report": "/api/datasets/<id>/report/",
+            "dataset_dashboard": "/api/datasets/<id|latest>/dashboard/",
+            "dataset_export": "/api/datasets/<id>/export/?format=csv|xlsx|parquet",
+            "search": "/api/search/?q=<name>&type=<type,...>"
         }
     })
 
@@ -54,75 +118,106 @@ class EquipmentUploadView(APIView):
             )
         
         try:
-            # Parse CSV with Pandas
-            if file.name.endswith('.csv'):
-                df = pd.read_csv(file)
-            elif file.name.endswith(('.xlsx', '.xls')):
-                df = pd.read_excel(file)
-            else:
+            record_bytes(file.size, direction='in')
+
+            if not file.name.lower().endswith(('.csv', '.xlsx', '.xls')):
                 return Response(
                     {"error": "Unsupported file format. Use CSV, XLSX, or XLS."}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
+
+            with span('parse'):
+                # Content hash lets identical re-uploads be found through an index
+                hasher = hashlib.sha256()
+                for chunk in file.chunks():
+                    hasher.update(chunk)
+                file.seek(0)
+
+                # Typed read: aliases resolved and dtypes declared up front
+                raw, mapping, header_units = read_equipment_table(file, file.name)
             
-            # Validate required columns
-            required_cols = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-            if not all(col in df.columns for col in required_cols):
-                return Response(
-                    {"error": f"Invalid schema. Required columns: {', '.join(required_cols)}"}, 
-                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
-                )
+            # Validate cells; invalid rows are dropped and reported
+            with span('validate'):
+                validation = check_result(validate_frame(raw, mapping, header_units))
+                df = validation.data
+
+            # Optional per-type outlier scoring; adds score/flag columns
+            anomaly_baseline = {}
+            if settings.EQUIPMENT_ANOMALY['ENABLED']:
+                with span('anomalies'):
+                    options = settings.EQUIPMENT_ANOMALY
+                    anomalies = detect_anomalies(df, options['Z_THRESHOLD'], options['IQR_K'])
+                    df = df.assign(anomaly_score=anomalies.scores, anomaly_flags=anomalies.flags)
+                    anomaly_baseline = anomalies.baseline
 
             # Calculate summary statistics
-            summary = {
-                "total_count": len(df),
-                "avg_flowrate": float(df['Flowrate'].mean()),
-                "avg_pressure": float(df['Pressure'].mean()),
-                "avg_temperature": float(df['Temperature'].mean()),
-                "type_distribution": df['Type'].value_counts().to_dict()
-            }
-            
-            # Prepare data for storage
-            data_records = df.to_dict(orient='records')
-            
-            # Normalize column names for frontend (snake_case)
-            normalized_data = []
-            for record in data_records:
-                normalized_data.append({
-                    'equipment_name': record['Equipment Name'],
-                    'type': record['Type'],
-                    'flowrate': float(record['Flowrate']),
-                    'pressure': float(record['Pressure']),
-                    'temperature': float(record['Temperature'])
-                })
+            with span('stats'):
+                summary = {
+                    "total_count": len(df),
+                    "avg_flowrate": float(df['Flowrate'].mean()),
+                    "avg_pressure": float(df['Pressure'].mean()),
+                    "avg_temperature": float(df['Temperature'].mean()),
+                    "type_distribution": {str(k): int(v) for k, v in df['Type'].value_counts().items()}
+                }
+                # Running sums and quantile sketches for later row upserts
+                running_stats = build_running_stats(df.rename(columns=SNAKE_CASE_COLUMNS))
+                summary["percentiles"] = percentiles(running_stats)
+                summary["anomaly_count"] = running_stats['anomalies']
             
-            # Generate unique ID
-            dataset_id = f"ds_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(file.name) % 10000}"
+            with span('serialize'):
+                # Normalize column names for frontend (snake_case); rows are
+                # built from column lists, much cheaper than to_dict('records')
+                snake = df.rename(columns=SNAKE_CASE_COLUMNS)
+                columns = {field: snake[field].tolist() for field in row_fields(snake.columns)}
+                normalized_data = rows_from_columns(columns)
             
-            # Save to database
-            dataset = Dataset.objects.create(
-                id=dataset_id,
-                filename=file.name,
-                total_count=summary['total_count'],
-                avg_flowrate=summary['avg_flowrate'],
-                avg_pressure=summary['avg_pressure'],
-                avg_temperature=summary['avg_temperature'],
-                type_distribution=summary['type_distribution'],
-                data=normalized_data
-            )
+            # Generate unique ID (random suffix: concurrent uploads share a second)
+            dataset_id = f"ds_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{secrets.token_hex(4)}"
             
-            # Maintain history limit (keep only last 5)
-            Dataset.maintain_history_limit()
+            # Insert and prune in one transaction. The insert comes first so
+            # the write lock is taken up front; on SQLite a transaction that
+            # reads before writing cannot wait out a busy lock.
+            with transaction.atomic():
+                with span('db_write'):
+                    dataset = Dataset(
+                        id=dataset_id,
+                        filename=file.name,
+                        content_hash=hasher.hexdigest(),
+                        total_count=summary['total_count'],
+                        avg_flowrate=summary['avg_flowrate'],
+                        avg_pressure=summary['avg_pressure'],
+                        avg_temperature=summary['avg_temperature'],
+                        type_distribution=summary['type_distribution'],
+                        running_stats=running_stats,
+                        anomaly_baseline=anomaly_baseline,
+                    )
+                    dataset.set_columns(columns)
+                    dataset.dashboard = build_dashboard(dataset)
+                    dataset.save(force_insert=True)
+                    transaction.on_commit(lambda: publish_dashboard(dataset, latest=True))
+                    transaction.on_commit(lambda: schedule_index(dataset))
+                # Apply history retention policy
+                with span('prune'):
+                    Dataset.maintain_history_limit(keep_id=dataset.id)
+            record_rows(summary['total_count'])
             
             return Response({
                 "id": dataset.id,
                 "filename": dataset.filename,
                 "timestamp": dataset.uploaded_at.isoformat(),
                 "summary": summary,
-                "data": normalized_data
+                "validation": validation.report,
+                "data": normalized_data,
+                "anomalies": anomaly_rows(columns)
             }, status=status.HTTP_201_CREATED)
             
+        except SchemaError as e:
+            return Response(
+                {"error": str(e), "validation": e.report}, 
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
         except Exception as e:
+            logger.exception("Upload processing failed for %s", file.name)
             return Response(
                 {"error": f"Processing failed: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -132,33 +227,31 @@ class EquipmentUploadView(APIView):
 class DatasetHistoryView(APIView):
     """
     GET /api/history/
-    Returns metadata of the last 5 successful uploads.
+    Returns the most recent uploads (5 by default, ?limit=N for more).
+    Pass ?include_data=false to skip the row payloads.
     """
     authentication_classes = [authentication.BasicAuthentication]
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         try:
-            datasets = Dataset.objects.all()[:5]  # Already ordered by -uploaded_at
+            include_data, limit = parse_history_params(request.query_params)
+            datasets = Dataset.objects.all()
+            if not include_data:
+                datasets = datasets.defer('payload')
+            with span('db_read'):
+                datasets = list(datasets[:limit])  # Already ordered by -uploaded_at
+                if include_data:
+                    Dataset.prefetch_overlays(datasets)
             
             history = []
-            for dataset in datasets:
-                history.append({
-                    "id": dataset.id,
-                    "filename": dataset.filename,
-                    "timestamp": dataset.uploaded_at.isoformat(),
-                    "summary": {
-                        "total_count": dataset.total_count,
-                        "avg_flowrate": dataset.avg_flowrate,
-                        "avg_pressure": dataset.avg_pressure,
-                        "avg_temperature": dataset.avg_temperature,
-                        "type_distribution": dataset.type_distribution
-                    },
-                    "data": dataset.data
-                })
+            with span('serialize'):
+                for dataset in datasets:
+                    history.append(serialize_dataset(dataset, include_data))
             
             return Response(history, status=status.HTTP_200_OK)
         except Exception as e:
+            logger.exception("History retrieval failed")
             return Response(
                 {"error": f"Failed to retrieve history: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -183,96 +276,172 @@ class GeneratePDFView(APIView):
                 )
             
             try:
-                dataset = Dataset.objects.get(id=dataset_id)
+                with span('db_read'):
+                    dataset = Dataset.objects.get(id=dataset_id)
             except Dataset.DoesNotExist:
                 return Response(
                     {"error": "Dataset not found"}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Create PDF
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = []
-            styles = getSampleStyleSheet()
-            
-            # Title
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#1e293b'),
-                spaceAfter=30,
-            )
-            title = Paragraph("ChemEquip Visualizer - Equipment Report", title_style)
-            elements.append(title)
-            
-            # Metadata
-            meta_style = styles['Normal']
-            elements.append(Paragraph(f"<b>Dataset:</b> {dataset.filename}", meta_style))
-            elements.append(Paragraph(f"<b>Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", meta_style))
-            elements.append(Paragraph(f"<b>Total Equipment:</b> {dataset.total_count}", meta_style))
-            elements.append(Spacer(1, 0.3 * inch))
-            
-            # Summary Statistics
-            elements.append(Paragraph("<b>Summary Statistics</b>", styles['Heading2']))
-            summary_data = [
-                ['Metric', 'Value'],
-                ['Average Flowrate', f"{dataset.avg_flowrate:.2f} m³/h"],
-                ['Average Pressure', f"{dataset.avg_pressure:.2f} bar"],
-                ['Average Temperature', f"{dataset.avg_temperature:.2f} °C"],
-            ]
-            summary_table = Table(summary_data, colWidths=[3*inch, 3*inch])
-            summary_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 12),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            elements.append(summary_table)
-            elements.append(Spacer(1, 0.3 * inch))
-            
-            # Equipment Data Table
-            elements.append(Paragraph("<b>Equipment Details</b>", styles['Heading2']))
-            table_data = [['Equipment', 'Type', 'Flow (m³/h)', 'Pressure (bar)', 'Temp (°C)']]
-            for item in dataset.data[:20]:  # Limit to first 20 for PDF
-                table_data.append([
-                    item['equipment_name'],
-                    item['type'],
-                    f"{item['flowrate']:.2f}",
-                    f"{item['pressure']:.2f}",
-                    f"{item['temperature']:.2f}"
-                ])
-            
-            data_table = Table(table_data, colWidths=[1.5*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch])
-            data_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ]))
-            elements.append(data_table)
-            
-            # Build PDF
-            doc.build(elements)
-            buffer.seek(0)
+            pdf_bytes = build_dataset_report(dataset)
+            record_bytes(len(pdf_bytes), direction='out')
             
             # Return PDF as download
-            response = HttpResponse(buffer, content_type='application/pdf')
+            response = HttpResponse(pdf_bytes, content_type='application/pdf')
             response['Content-Disposition'] = f'attachment; filename="equipment_report_{dataset.id}.pdf"'
             return response
             
         except Exception as e:
+            logger.exception("PDF generation failed")
             return Response(
                 {"error": f"PDF generation failed: {str(e)}"}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+class EquipmentSearchView(APIView):
+    """
+    GET /api/search/?q=<name>
+    Typeahead search over equipment names across all retained datasets:
+    exact and prefix matches first, then word-start and fuzzy matches.
+    Optional ?type=Pump,Valve and ?dataset=<id,...> narrow the search;
+    ?limit caps the results (20 by default). A unit held by several
+    datasets is listed once, from the newest, with all their ids.
+    """
+    authentication_classes = [authentication.BasicAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Query parameter 'q' is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT)), SEARCH_MAX_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        types = _csv_param(request.query_params, 'type')
+        dataset_ids = _csv_param(request.query_params, 'dataset')
+
+        try:
+            with span('search'):
+                results = search_equipment(query, types=types, dataset_ids=dataset_ids, limit=limit)
+        except Exception as e:
+            logger.exception("Search failed")
+            return Response(
+                {"error": f"Search failed: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        return Response({"query": query, "count": len(results), "results": results})
+
+
+def _csv_param(params, name):
+    # ?type=Pump,Valve and ?type=Pump&type=Valve both work; None when absent
+    values = [v.strip() for item in params.getlist(name) for v in item.split(',') if v.strip()]
+    return values or None
+
+
+class DatasetDashboardView(APIView):
+    """
+    GET /api/datasets/<id>/dashboard/
+    The dataset's materialized dashboard summary (averages, total flow, unit
+    count, type composition), served from the cache. Use "latest" as the id
+    for the newest dataset, so a first paint needs a single request.
+    """
+    authentication_classes = [authentication.BasicAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, dataset_id):
+        payload = cached_dashboard(dataset_id)
+        if payload is not None:
+            response = Response(payload)
+            response['X-Cache'] = 'hit'
+            return response
+
+        datasets = Dataset.objects.defer('payload')
+        with span('db_read'):
+            if dataset_id == LATEST:
+                dataset = datasets.first()
+            else:
+                dataset = datasets.filter(id=dataset_id).first()
+        if dataset is None:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Datasets stored before materialization get theirs built on read
+        payload = dataset.dashboard or build_dashboard(dataset)
+        cache_dashboard(dataset_id, payload)
+        response = Response(payload)
+        response['X-Cache'] = 'miss'
+        return response
+
+
+async def _aiter_in_executor(chunks):
+    # Under ASGI, pull each chunk from the sync generator in the executor so
+    # encoding never blocks the event loop and nothing is buffered up front.
+    while True:
+        chunk = await run_cpu(next, chunks, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+class DatasetExportView(APIView):
+    """
+    GET /api/datasets/<id>/export/?format=csv|xlsx|parquet
+    Stream a stored dataset as a file download.
+    Optional filters: columns=..., type=..., min_<field>=..., max_<field>=...,
+    anomalous=true|false, min_anomaly_score=...
+    """
+    authentication_classes = [authentication.BasicAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= selects the export format here, not a DRF renderer
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    def get(self, request, dataset_id):
+        try:
+            fmt, columns, filters = parse_export_params(request.query_params)
+            with span('db_read'):
+                dataset = Dataset.objects.only('id', 'filename', 'payload', 'overlay_rows').get(id=dataset_id)
+            with span('decode'):
+                columns_data = dataset.columns()
+            chunks = iter_export(columns_data, fmt, columns, filters)
+        except ExportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Dataset.DoesNotExist:
+            return Response({"error": "Dataset not found"}, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            logger.exception("Export failed for %s", dataset_id)
+            return Response(
+                {"error": f"Export failed: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        content_type, extension = EXPORT_FORMATS[fmt]
+        # META is the WSGI environ under WSGI; ASGI requests have no wsgi.* keys
+        if 'wsgi.input' not in request.META:
+            chunks = _aiter_in_executor(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        stem = dataset.filename.rsplit('.', 1)[0] or dataset.id
+        response['Content-Disposition'] = f'attachment; filename="{stem}_{dataset.id}.{extension}"'
+        return response
+
+
+class MetricsView(APIView):
+    """
+    GET /api/metrics/
+    Prometheus-style metrics for this process. Scrapers authenticate with
+    HTTP Basic credentials like any other API client.
+    """
+    authentication_classes = [authentication.BasicAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Plain text whatever the scraper accepts; errors still render as JSON
+        renderer = JSONRenderer()
+        return renderer, renderer.media_type
+
+    def get(self, request):
+        return HttpResponse(METRICS.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
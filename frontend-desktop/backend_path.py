@@ -0,0 +1,21 @@
+"""
+ARCHITECTURE: /frontend-desktop/src/
+Purpose: Makes the shared backend package importable from the desktop app.
+Features: Appends ../backend to sys.path once, so `equipment.*` (validation,
+anomaly scoring, chart drawing, synthetic data) resolves the same way
+whichever desktop module is imported first. Import it before any
+`equipment` import.
+
+Only the backend modules without Django imports (equipment.validation,
+anomalies, plotting, synthetic, storage, exports) are usable here: the
+desktop app never configures Django settings, so keep those modules free
+of Django imports.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'backend'))
+
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
@@ -0,0 +1,116 @@
+"""
+ARCHITECTURE: /frontend-desktop/src/
+Purpose: Multi-file batch import for the desktop client.
+Features: Parallel parse/validate in a process pool, per-file partial
+statistics merged into one registry with a source-file column, progress
+callbacks and a single store transaction for the newly parsed files.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from dataset_store import merge_stats, parse_dataset
+
+SOURCE_COLUMN = 'Source File'
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx', '.xls')
+
+
+def expand_paths(paths):
+    """
+    Expand folders into the dataset files they contain (non-recursive).
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if os.path.isfile(full) and name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    files.append(full)
+        else:
+            files.append(path)
+    return files
+
+
+def _parse_worker(path):
+    # Runs in a child process; errors are returned rather than raised so one
+    # bad file does not abort the whole batch.
+    try:
+        df, stats, _ = parse_dataset(path)
+        return path, df, stats, None
+    except Exception as e:
+        return path, None, None, str(e)
+
+
+def import_batch(paths, store=None, max_workers=None, progress=None):
+    """
+    Import several files into one registry.
+
+    Files already in the local store are loaded from it; the rest are parsed
+    in parallel and saved to the store in one transaction. `progress`, if
+    given, is called as progress(done, total) after each file. Safe to run
+    off the UI thread as long as `store` was opened on the same thread.
+
+    Each file keeps the anomaly scores from its own import (rows are compared
+    within their file), and the batch count is the sum of the per-file
+    counts. Returns (DataFrame, stats, errors) where errors maps file path
+    to message for files that were skipped.
+    """
+    files = expand_paths(paths)
+    results = {}
+    errors = {}
+
+    done = 0
+
+    def advance():
+        nonlocal done
+        done += 1
+        if progress is not None:
+            progress(done, len(files))
+
+    pending = []
+    for path in files:
+        cached = store.load(path) if store is not None else None
+        if cached is not None:
+            results[path] = cached
+            advance()
+        else:
+            pending.append(path)
+
+    parsed = []
+    if len(pending) == 1:
+        parsed.append(_parse_worker(pending[0]))
+        advance()
+    elif pending:
+        workers = min(len(pending), max_workers or os.cpu_count() or 1)
+        # Spawned, not forked: the caller is a thread of the Qt process, and
+        # forking a multithreaded process can deadlock the children
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for future in as_completed([pool.submit(_parse_worker, path) for path in pending]):
+                parsed.append(future.result())
+                advance()
+
+    fresh = []
+    for path, df, stats, error in parsed:
+        if error is not None:
+            errors[path] = error
+            continue
+        results[path] = (df, stats)
+        fresh.append((path, df, stats))
+    if store is not None and fresh:
+        store.save_many(fresh)
+
+    frames = []
+    parts = []
+    for path in files:
+        if path not in results:
+            continue
+        df, stats = results[path]
+        frames.append(df.assign(**{SOURCE_COLUMN: os.path.basename(path)}))
+        parts.append(stats)
+
+    if not frames:
+        return None, None, errors
+    return pd.concat(frames, ignore_index=True), merge_stats(parts), errors
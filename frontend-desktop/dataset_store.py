@@ -0,0 +1,258 @@
+"""
+ARCHITECTURE: /frontend-desktop/src/
+Purpose: Local persistent store for imported equipment datasets.
+Features: SQLite index under the user's data dir, compact binary payloads
+keyed by path + mtime + size with a content hash fallback, cached summary
+statistics, a format version and an LRU size cap.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+# The typed validation engine is shared with the backend API
+import backend_path  # noqa: F401
+from equipment.anomalies import detect_anomalies
+from equipment.validation import load_equipment_table
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+# Bump whenever the cached DataFrame changes (validation rules, added
+# columns such as the anomaly scores): a store written by another version
+# is emptied on open, so stale entries are re-parsed rather than reused
+CACHE_VERSION = 2
+
+_HASH_BLOCK = 1024 * 1024
+
+# Per-row outlier columns added by score_anomalies (same headers as API exports)
+ANOMALY_SCORE_COLUMN = 'Anomaly Score'
+ANOMALY_FLAGS_COLUMN = 'Anomaly Flags'
+
+
+def default_store_dir():
+    """
+    Per-user data directory for the desktop client.
+    """
+    if os.name == 'nt':
+        base = os.getenv('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'ChemEquip', 'datasets')
+    base = os.getenv('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(base, 'chemequip', 'datasets')
+
+
+def compute_stats(df):
+    """
+    Summary statistics shown on the stat cards and in the PDF report.
+    """
+    return {
+        "total_count": int(len(df)),
+        "avg_flowrate": float(df['Flowrate'].mean()),
+        "avg_pressure": float(df['Pressure'].mean()),
+        "avg_temperature": float(df['Temperature'].mean()),
+        "total_flowrate": float(df['Flowrate'].sum()),
+        "type_distribution": {str(k): int(v) for k, v in df['Type'].value_counts().items()},
+        "anomaly_count": int((df[ANOMALY_FLAGS_COLUMN] != 0).sum()) if ANOMALY_FLAGS_COLUMN in df.columns else 0,
+    }
+
+
+def score_anomalies(df):
+    """
+    Per-type robust z-score / IQR outlier scoring (shared with the backend
+    ingest stage). Returns a copy with the anomaly score and flag columns.
+    """
+    result = detect_anomalies(df)
+    return df.assign(**{ANOMALY_SCORE_COLUMN: result.scores, ANOMALY_FLAGS_COLUMN: result.flags})
+
+
+def merge_stats(parts):
+    """
+    Combine per-file statistics into dataset-wide statistics without
+    touching the rows again. Averages are re-weighted by unit count.
+    """
+    total = sum(p['total_count'] for p in parts)
+    types = {}
+    for p in parts:
+        for name, count in p['type_distribution'].items():
+            types[name] = types.get(name, 0) + count
+
+    def weighted(key):
+        if not total:
+            return 0.0
+        return sum(p[key] * p['total_count'] for p in parts if p['total_count']) / total
+
+    return {
+        "total_count": total,
+        "avg_flowrate": weighted('avg_flowrate'),
+        "avg_pressure": weighted('avg_pressure'),
+        "avg_temperature": weighted('avg_temperature'),
+        "total_flowrate": sum(p['total_flowrate'] for p in parts),
+        "type_distribution": types,
+        "anomaly_count": sum(p.get('anomaly_count', 0) for p in parts),
+    }
+
+
+def content_hash(path):
+    """
+    SHA-256 of a file's bytes, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def fingerprint(path):
+    """
+    Identity of a file on disk: (absolute path, mtime in ns, size).
+    """
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+class DatasetStore:
+    """
+    Cache of previously imported files.
+
+    Each entry holds the parsed DataFrame (pickled, so columns come back with
+    their dtypes without re-parsing) and its computed statistics. An entry is
+    reused while the source file's mtime and size are unchanged; when only
+    the mtime moved (file touched or copied over) the content hash decides.
+    """
+
+    def __init__(self, root_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root_dir = root_dir or default_store_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.root_dir, exist_ok=True)
+        self.db_path = os.path.join(self.root_dir, 'store.sqlite3')
+        self._conn = sqlite3.connect(self.db_path)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != CACHE_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS datasets")
+            self._conn.execute(f"PRAGMA user_version = {CACHE_VERSION:d}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS datasets (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                stats TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_opened REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_opened ON datasets (last_opened)")
+        self._conn.commit()
+
+    def load(self, path):
+        """
+        Return (DataFrame, stats) for a cached file, or None on a miss or
+        when the file changed since it was cached.
+        """
+        key, mtime_ns, size = fingerprint(path)
+        row = self._conn.execute(
+            "SELECT mtime_ns, size, content_hash, stats, payload FROM datasets WHERE path = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] != size:
+            return None
+        if row[0] != mtime_ns and content_hash(path) != row[2]:
+            return None
+        try:
+            df = pickle.loads(row[4])
+        except Exception:
+            self.remove(key)
+            return None
+        self._conn.execute(
+            "UPDATE datasets SET last_opened = ?, mtime_ns = ? WHERE path = ?", (time.time(), mtime_ns, key)
+        )
+        self._conn.commit()
+        return df, json.loads(row[3])
+
+    def save(self, path, df, stats):
+        """
+        Store a parsed dataset, replacing any older version of the same file.
+        """
+        self.save_many([(path, df, stats)])
+
+    def save_many(self, entries):
+        """
+        Store several (path, DataFrame, stats) entries in one transaction.
+        """
+        for path, df, stats in entries:
+            key, mtime_ns, size = fingerprint(path)
+            payload = pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO datasets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, mtime_ns, size, content_hash(path), len(df), json.dumps(stats), payload, len(payload),
+                 time.time())
+            )
+        self._evict()
+        self._conn.commit()
+
+    def remove(self, path):
+        self._conn.execute("DELETE FROM datasets WHERE path = ?", (os.path.abspath(path),))
+        self._conn.commit()
+
+    def recent(self, limit=10):
+        """
+        Most recently opened datasets, newest first.
+        """
+        rows = self._conn.execute(
+            "SELECT path, row_count, last_opened FROM datasets ORDER BY last_opened DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+        return [
+            {"path": path, "filename": os.path.basename(path), "rows": count, "last_opened": opened}
+            for path, count, opened in rows
+        ]
+
+    def total_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM datasets").fetchone()[0]
+
+    def _evict(self):
+        # Drop least recently opened entries until the payloads fit the cap.
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for path, nbytes in self._conn.execute(
+            "SELECT path, nbytes FROM datasets ORDER BY last_opened ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM datasets WHERE path = ?", (path,))
+            total -= nbytes
+
+    def close(self):
+        self._conn.close()
+
+
+def parse_dataset(path):
+    """
+    Parse, validate and score a dataset file. Invalid rows are dropped.
+    Returns (DataFrame, stats, validation report).
+    Raises SchemaError (a ValueError) if the file has no usable rows.
+    """
+    result = load_equipment_table(path)
+    df = score_anomalies(result.data)
+    return df, compute_stats(df), result.report
+
+
+def read_dataset(path, store=None):
+    """
+    Load a dataset from the store if possible, otherwise parse and cache it.
+    Returns (DataFrame, stats, report); report is None on a cache hit.
+    """
+    if store is not None:
+        cached = store.load(path)
+        if cached is not None:
+            return cached[0], cached[1], None
+
+    df, stats, report = parse_dataset(path)
+    if store is not None:
+        store.save(path, df, stats)
+    return df, stats, report
@@ -7,6 +7,7 @@ Features: CSV loading via Pandas, Table views, and Matplotlib integration.
 
 import sys
 import os
+import io
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -16,17 +17,58 @@ from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QPushButton, QFileDialog, QTableWidget, 
                              QTableWidgetItem, QLabel, QFrame, QHeaderView, QMessageBox,
-                             QScrollArea, QGridLayout)
-from PyQt5.QtCore import Qt
+                             QScrollArea, QGridLayout, QListWidget, QListWidgetItem, QMenu)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPixmap
 
+import backend_path  # noqa: F401  (puts the backend package on sys.path; before any equipment import)
+from equipment.anomalies import flagged_columns
+from equipment.plotting import CHART_SPECS, draw_chart
+from dataset_store import ANOMALY_FLAGS_COLUMN, ANOMALY_SCORE_COLUMN, DatasetStore, fingerprint, read_dataset
+from batch_import import SOURCE_COLUMN, expand_paths, import_batch
+from report_charts import frame_columns, get_chart
+
+DATASET_FILE_FILTER = "Equipment Datasets (*.csv *.xlsx *.xls)"
+
+
+class BatchImportThread(QThread):
+    """
+    Runs a batch import off the UI thread. The local store is opened on the
+    worker thread itself, since SQLite connections are per thread.
+    """
+    progress = pyqtSignal(int, int)
+    succeeded = pyqtSignal(object, object, object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, paths, store_dir, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.store_dir = store_dir
+
+    def run(self):
+        store = DatasetStore(self.store_dir)
+        try:
+            data, stats, errors = import_batch(self.paths, store, progress=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        finally:
+            store.close()
+        self.succeeded.emit(data, stats, errors)
+
+
 class EquipmentDashboard(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("ChemEquip Visualizer Desktop v2.1")
         self.setGeometry(100, 100, 1280, 850)
         self.data = None
+        self.stats = None
+        self.dataset_key = None
+        self.batch_thread = None
+        self.store = DatasetStore()
         self.init_ui()
+        self.refresh_recent()
 
     def init_ui(self):
         # Set Global Style
@@ -96,6 +138,14 @@ class EquipmentDashboard(QMainWindow):
         self.upload_btn.setFixedWidth(200)
         self.upload_btn.clicked.connect(self.handle_upload)
         header.addWidget(self.upload_btn)
+
+        self.batch_btn = QPushButton("BATCH IMPORT")
+        self.batch_btn.setFixedWidth(160)
+        batch_menu = QMenu(self.batch_btn)
+        batch_menu.addAction("Select Files...", self.handle_batch_files)
+        batch_menu.addAction("Select Folder...", self.handle_batch_folder)
+        self.batch_btn.setMenu(batch_menu)
+        header.addWidget(self.batch_btn)
         
         main_layout.addLayout(header)
 
@@ -126,6 +176,15 @@ class EquipmentDashboard(QMainWindow):
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setAlternatingRowColors(True)
         left_panel.addWidget(self.table)
+
+        recent_label = QLabel("Recent Datasets")
+        recent_label.setFont(QFont("Inter", 11, QFont.Bold))
+        left_panel.addWidget(recent_label)
+
+        self.recent_list = QListWidget()
+        self.recent_list.setMaximumHeight(140)
+        self.recent_list.itemDoubleClicked.connect(self.open_recent)
+        left_panel.addWidget(self.recent_list)
         
         content_area.addLayout(left_panel, 3)
 
@@ -190,66 +249,162 @@ class EquipmentDashboard(QMainWindow):
 
     def handle_upload(self):
         options = QFileDialog.Options()
-        file_name, _ = QFileDialog.getOpenFileName(self, "Import Equipment Dataset", "", "CSV Files (*.csv)", options=options)
+        file_name, _ = QFileDialog.getOpenFileName(self, "Import Equipment Dataset", "", DATASET_FILE_FILTER, options=options)
         
         if file_name:
-            try:
-                # Actual production parsing using Pandas
-                self.data = pd.read_csv(file_name)
-                
-                # Validation
-                required = ['Equipment Name', 'Type', 'Flowrate', 'Pressure', 'Temperature']
-                if not all(col in self.data.columns for col in required):
-                    QMessageBox.critical(self, "Invalid Format", f"CSV must contain columns: {', '.join(required)}")
-                    return
-                
-                self.update_ui()
-                self.table_label.setText(f"Active Asset Registry ({os.path.basename(file_name)})")
-                self.export_btn.setEnabled(True)
-            except Exception as e:
-                QMessageBox.critical(self, "Import Error", f"Failed to process dataset: {str(e)}")
+            self.load_dataset(file_name)
+
+    def load_dataset(self, file_name):
+        try:
+            # Previously imported files reopen from the local store without re-parsing
+            self.data, self.stats, report = read_dataset(file_name, self.store)
+            self.dataset_key = fingerprint(file_name)
+        except ValueError as e:
+            QMessageBox.critical(self, "Invalid Format", str(e))
+            return
+        except Exception as e:
+            QMessageBox.critical(self, "Import Error", f"Failed to process dataset: {str(e)}")
+            return
+
+        self.update_ui()
+        self.table_label.setText(f"Active Asset Registry ({os.path.basename(file_name)})")
+        self.export_btn.setEnabled(True)
+        self.refresh_recent()
+
+        if report and report['invalid_rows']:
+            details = "\n".join(f"Row {e['row']}, {e['column']}: {e['error']} ({e['value']})" for e in report['errors'][:10])
+            QMessageBox.warning(
+                self, "Rows Skipped",
+                f"{report['invalid_rows']} of {report['total_rows']} rows failed validation and were skipped.\n\n{details}"
+            )
+
+    def handle_batch_files(self):
+        file_names, _ = QFileDialog.getOpenFileNames(self, "Batch Import Datasets", "", DATASET_FILE_FILTER)
+        if file_names:
+            self.load_batch(file_names)
+
+    def handle_batch_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Batch Import Folder")
+        if folder:
+            self.load_batch([folder])
+
+    def load_batch(self, paths):
+        if self.batch_thread is not None:
+            return
+        self.batch_btn.setEnabled(False)
+        self.upload_btn.setEnabled(False)
+        self.statusBar().showMessage("Importing datasets...")
+        # Bound methods, so the worker's signals are queued onto the UI thread
+        self.batch_thread = BatchImportThread(paths, self.store.root_dir, self)
+        self.batch_thread.progress.connect(self.batch_progress)
+        self.batch_thread.succeeded.connect(self.show_batch)
+        self.batch_thread.failed.connect(self.batch_failed)
+        self.batch_thread.finished.connect(self.batch_finished)
+        self.batch_thread.start()
+
+    def batch_progress(self, done, total):
+        self.statusBar().showMessage(f"Imported {done} of {total} files...")
+
+    def batch_failed(self, message):
+        QMessageBox.critical(self, "Import Error", f"Batch import failed: {message}")
+
+    def batch_finished(self):
+        self.batch_thread.deleteLater()
+        self.batch_thread = None
+        self.batch_btn.setEnabled(True)
+        self.upload_btn.setEnabled(True)
+        self.statusBar().clearMessage()
+
+    def show_batch(self, data, stats, errors):
+        paths = self.batch_thread.paths
+        if errors:
+            details = "\n".join(f"{os.path.basename(p)}: {msg}" for p, msg in errors.items())
+            QMessageBox.warning(self, "Skipped Files", f"{len(errors)} file(s) could not be imported:\n{details}")
+        if data is None:
+            return
+
+        self.data, self.stats = data, stats
+        self.dataset_key = tuple(fingerprint(p) for p in expand_paths(paths))
+        self.update_ui()
+        files = data[SOURCE_COLUMN].nunique()
+        self.table_label.setText(f"Active Asset Registry ({files} files)")
+        self.export_btn.setEnabled(True)
+        self.refresh_recent()
+
+    def refresh_recent(self):
+        self.recent_list.clear()
+        for entry in self.store.recent():
+            item = QListWidgetItem(f"{entry['filename']}  ({entry['rows']} units)")
+            item.setData(Qt.UserRole, entry['path'])
+            item.setToolTip(entry['path'])
+            self.recent_list.addItem(item)
+
+    def open_recent(self, item):
+        path = item.data(Qt.UserRole)
+        if not os.path.exists(path):
+            QMessageBox.warning(self, "Missing File", f"File no longer exists: {path}")
+            self.store.remove(path)
+            self.refresh_recent()
+            return
+        self.load_dataset(path)
 
     def update_ui(self):
         if self.data is None: return
 
         # 1. Update Stats
-        self.card_widgets["Avg Pressure"].setText(f"{self.data['Pressure'].mean():.2f} bar")
-        self.card_widgets["Avg Temp"].setText(f"{self.data['Temperature'].mean():.1f} C")
-        self.card_widgets["Total Flow"].setText(f"{self.data['Flowrate'].sum():.1f} m3/h")
-        self.card_widgets["Unit Count"].setText(str(len(self.data)))
+        self.card_widgets["Avg Pressure"].setText(f"{self.stats['avg_pressure']:.2f} bar")
+        self.card_widgets["Avg Temp"].setText(f"{self.stats['avg_temperature']:.1f} C")
+        self.card_widgets["Total Flow"].setText(f"{self.stats['total_flowrate']:.1f} m3/h")
+        self.card_widgets["Unit Count"].setText(str(self.stats['total_count']))
 
         # 2. Update Table Registry
+        has_source = SOURCE_COLUMN in self.data.columns
+        headers = ["Equipment Name", "Type", "Flow (m3/h)", "Pressure (bar)", "Temp (C)"]
+        if has_source:
+            headers.append("Source File")
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
         self.table.setRowCount(len(self.data))
+        # Entries cached before anomaly scoring have no flag column
+        has_anomalies = ANOMALY_FLAGS_COLUMN in self.data.columns
         for i, row in self.data.iterrows():
             self.table.setItem(i, 0, QTableWidgetItem(str(row['Equipment Name'])))
             self.table.setItem(i, 1, QTableWidgetItem(str(row['Type'])))
-            self.table.setItem(i, 2, QTableWidgetItem(f"{row['Flowrate']:.2f}"))
-            self.table.setItem(i, 3, QTableWidgetItem(f"{row['Pressure']:.2f}"))
-            
+            flow_item = QTableWidgetItem(f"{row['Flowrate']:.2f}")
+            pressure_item = QTableWidgetItem(f"{row['Pressure']:.2f}")
             temp_item = QTableWidgetItem(f"{row['Temperature']:.1f}")
+
+            # Per-type outliers in amber; the fixed temperature limit stays red
+            if has_anomalies and row[ANOMALY_FLAGS_COLUMN]:
+                cells = {'Flowrate': flow_item, 'Pressure': pressure_item, 'Temperature': temp_item}
+                for column in flagged_columns(int(row[ANOMALY_FLAGS_COLUMN])):
+                    cells[column].setForeground(QColor("#d97706"))
+                    cells[column].setFont(QFont("Inter", weight=QFont.Bold))
+                    cells[column].setToolTip(f"Anomaly score {row[ANOMALY_SCORE_COLUMN]:.2f}")
             if row['Temperature'] > 200:
                 temp_item.setForeground(QColor("#ef4444"))
                 temp_item.setFont(QFont("Inter", weight=QFont.Bold))
+            self.table.setItem(i, 2, flow_item)
+            self.table.setItem(i, 3, pressure_item)
             self.table.setItem(i, 4, temp_item)
+            if has_source:
+                self.table.setItem(i, 5, QTableWidgetItem(str(row[SOURCE_COLUMN])))
 
         # 3. Update Matplotlib Charts
         for ax in self.axes: ax.clear()
         
-        # Chart 1: Flowrate Distribution
-        self.data.plot(kind='bar', x='Equipment Name', y='Flowrate', ax=self.axes[0], color='#3b82f6', legend=False)
-        self.axes[0].set_title("Flowrate by Equipment Unit", fontsize=9, fontweight='bold')
-        self.axes[0].tick_params(axis='x', labelsize=7, labelrotation=45)
+        # Chart 1: Flowrate (shared report drawing: histogram for large datasets)
+        columns = frame_columns(self.data)
+        draw_chart(self.axes[0], 'flowrate', self.stats['type_distribution'], columns)
         
         # Chart 2: Type Distribution
-        counts = self.data['Type'].value_counts()
+        counts = pd.Series(self.stats['type_distribution'])
         self.axes[1].pie(counts, labels=counts.index, autopct='%1.1f%%', startangle=140, 
                          colors=['#3b82f6', '#10b981', '#f59e0b', '#8b5cf6', '#ef4444'])
         self.axes[1].set_title("Asset Type Composition", fontsize=9, fontweight='bold')
         
-        # Chart 3: Pressure vs Temperature Scatter
-        sns.scatterplot(data=self.data, x='Pressure', y='Temperature', hue='Type', ax=self.axes[2])
-        self.axes[2].set_title("Pressure vs Temperature Correlation", fontsize=9, fontweight='bold')
-        self.axes[2].legend(fontsize=7, bbox_to_anchor=(1.05, 1), loc='upper left')
+        # Chart 3: Pressure vs Temperature Scatter (sampled for large datasets)
+        draw_chart(self.axes[2], 'pressure_temperature', self.stats['type_distribution'], columns)
         
         # Chart 4: Temperature Distribution Boxplot
         sns.boxplot(data=self.data, x='Type', y='Temperature', ax=self.axes[3], palette="Set2")
@@ -285,10 +440,10 @@ class EquipmentDashboard(QMainWindow):
             pdf.ln(5)
             
             pdf.set_font("Helvetica", "", 11)
-            pdf.cell(90, 8, f"Total Equipment Units: {len(self.data)}")
-            pdf.cell(90, 8, f"Average Pressure: {self.data['Pressure'].mean():.2f} bar", ln=True)
-            pdf.cell(90, 8, f"Average Temperature: {self.data['Temperature'].mean():.1f} C")
-            pdf.cell(90, 8, f"Total System Flow: {self.data['Flowrate'].sum():.1f} m3/h", ln=True)
+            pdf.cell(90, 8, f"Total Equipment Units: {self.stats['total_count']}")
+            pdf.cell(90, 8, f"Average Pressure: {self.stats['avg_pressure']:.2f} bar", ln=True)
+            pdf.cell(90, 8, f"Average Temperature: {self.stats['avg_temperature']:.1f} C")
+            pdf.cell(90, 8, f"Total System Flow: {self.stats['total_flowrate']:.1f} m3/h", ln=True)
             pdf.ln(10)
 
             # Asset Table
@@ -314,9 +469,16 @@ class EquipmentDashboard(QMainWindow):
                 pdf.cell(widths[4], 7, f"{row['Temperature']:.1f}", border=1, align="C")
                 pdf.ln()
 
-            # Save Visuals (Optional/Bonus: In progress)
-            # For simplicity in this v1, we focus on data and stats. 
-            # To add charts, we'd save the figure to a temp file and pdf.image() it.
+            # Visuals (rendered off-screen to memory, cached per dataset)
+            pdf.add_page()
+            pdf.set_font("Helvetica", "B", 12)
+            pdf.cell(0, 10, " 3. VISUAL ANALYTICS", ln=True, fill=True)
+            pdf.ln(5)
+            for chart, (_, (width, height)) in CHART_SPECS.items():
+                image = get_chart(self.dataset_key, chart, self.data, self.stats)
+                w = min(180, width * 25.4)
+                pdf.image(io.BytesIO(image), x=(210 - w) / 2, w=w, h=w * height / width)
+                pdf.ln(5)
             
             pdf.output(file_path)
             QMessageBox.information(self, "Export Successful", f"Report saved to: {file_path}")
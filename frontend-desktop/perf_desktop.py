@@ -0,0 +1,141 @@
+"""
+ARCHITECTURE: /frontend-desktop/src/
+Purpose: Headless performance run for the desktop client.
+Features: Seeded synthetic datasets from the shared backend generator,
+timed load_dataset, update_ui and export_to_pdf under the offscreen Qt
+platform, with a throwaway dataset store so the user's is never touched.
+
+Fixtures are shared with the backend perf suite (manage.py perf_suite).
+
+Usage: python perf_desktop.py --rows 1000,10000 --repeat 3
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Must be set before Qt is imported
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+class _Dialogs:
+    """
+    Stand-ins for the modal dialogs the timed paths open: the save dialog
+    answers with a fixed path, message boxes are recorded instead of shown.
+    """
+
+    def __init__(self, save_path):
+        self.save_path = save_path
+        self.messages = []
+
+    def getSaveFileName(self, *args, **kwargs):
+        return self.save_path, "PDF Files (*.pdf)"
+
+    def information(self, parent, title, text):
+        self.messages.append(('information', title, text))
+
+    def warning(self, parent, title, text):
+        self.messages.append(('warning', title, text))
+
+    def critical(self, parent, title, text):
+        self.messages.append(('critical', title, text))
+
+    def errors(self):
+        return [f"{title}: {text}" for level, title, text in self.messages if level == 'critical']
+
+
+def _timed(app, func):
+    wall, cpu = time.perf_counter(), time.process_time()
+    func()
+    # Flush pending paints so table and chart rendering is counted
+    app.processEvents()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def run(sizes, seed, repeat, fixtures_dir):
+    work_dir = tempfile.mkdtemp(prefix='chemequip_perf_')
+    # DatasetStore lives under the user's data dir; point it at the scratch dir
+    os.environ['XDG_DATA_HOME'] = work_dir
+    os.environ['LOCALAPPDATA'] = work_dir
+
+    from PyQt5.QtWidgets import QApplication
+    import main as desktop
+    from equipment.synthetic import ensure_fixture
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    dialogs = _Dialogs(os.path.join(work_dir, 'report.pdf'))
+    desktop.QFileDialog = dialogs
+    desktop.QMessageBox = dialogs
+
+    results = []
+    try:
+        for rows in sizes:
+            path, elapsed = ensure_fixture(rows, seed, 'csv', fixtures_dir)
+            if elapsed:
+                print(f"Generated {path} ({os.path.getsize(path) / 1e6:.1f} MB) in {elapsed:.1f}s")
+
+            window = desktop.EquipmentDashboard()
+            window.show()
+            steps = [
+                # First run parses and validates; later runs reopen from the local store
+                ('load_dataset', lambda: window.load_dataset(path)),
+                ('update_ui', window.update_ui),
+                ('export_to_pdf', window.export_to_pdf),
+            ]
+            for step, func in steps:
+                walls, cpus = [], []
+                dialogs.messages.clear()
+                for _ in range(repeat):
+                    wall, cpu = _timed(app, func)
+                    walls.append(wall)
+                    cpus.append(cpu)
+                errors = dialogs.errors()
+                results.append({'rows': rows, 'step': step, 'wall': walls, 'cpu': cpus, 'errors': errors})
+                print(
+                    f"rows={rows:<9} {step:<13} first={walls[0] * 1000:9.1f}ms "
+                    f"min={min(walls) * 1000:9.1f}ms median={statistics.median(walls) * 1000:9.1f}ms "
+                    f"cpu_median={statistics.median(cpus) * 1000:9.1f}ms"
+                )
+                for message in sorted(set(errors)):
+                    print(f"    {errors.count(message)} x {message}")
+            window.store.close()
+            window.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    import backend_path  # noqa: F401  (puts the backend package on sys.path)
+    from equipment.synthetic import DEFAULT_FIXTURES_DIR
+
+    parser = argparse.ArgumentParser(description="Time the desktop client's load, update_ui and PDF export.")
+    parser.add_argument('--rows', default='1000,10000', help="Comma-separated dataset sizes")
+    parser.add_argument('--seed', type=int, default=0, help="Synthetic data seed")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per step")
+    parser.add_argument('--fixtures-dir', default=DEFAULT_FIXTURES_DIR, help="Where generated fixtures are kept")
+    parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(size) for size in args.rows.split(',') if size.strip()]
+    except ValueError:
+        parser.error("--rows must be a comma-separated list of integers")
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    results = run(sizes, args.seed, args.repeat, args.fixtures_dir)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+        print(f"Results written to {args.json_path}")
+    return 1 if any(r['errors'] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
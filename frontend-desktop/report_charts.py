@@ -0,0 +1,47 @@
+"""
+ARCHITECTURE: /frontend-desktop/src/
+Purpose: Off-screen chart rendering for PDF exports.
+Features: Adapts the loaded DataFrame to the shared chart drawing
+(equipment.plotting, also used by the API's PDF reports) and caches the
+in-memory PNGs per dataset and chart spec, so repeated exports reuse them.
+"""
+
+from collections import OrderedDict
+
+import backend_path  # noqa: F401  (puts the backend package on sys.path)
+from equipment.plotting import render_chart
+
+MAX_CACHED_CHARTS = 32
+
+# Upload schema header -> storage field, as the shared drawing expects
+FRAME_FIELDS = {
+    'Equipment Name': 'equipment_name',
+    'Type': 'type',
+    'Flowrate': 'flowrate',
+    'Pressure': 'pressure',
+    'Temperature': 'temperature',
+}
+
+_cache = OrderedDict()
+
+
+def frame_columns(df):
+    """
+    The DataFrame's chart columns as arrays keyed by storage field name.
+    """
+    return {field: df[column].to_numpy() for column, field in FRAME_FIELDS.items()}
+
+
+def get_chart(dataset_key, chart, df, stats, dpi=110):
+    """
+    Return cached PNG bytes for (dataset, chart, dpi), rendering on a miss.
+    """
+    key = (dataset_key, chart, dpi)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    image = render_chart(chart, stats['type_distribution'], frame_columns(df), 'png', dpi)
+    _cache[key] = image
+    if len(_cache) > MAX_CACHED_CHARTS:
+        _cache.popitem(last=False)
+    return image
@@ -5,7 +5,7 @@
  */
 
 import React, { useState, useEffect } from 'react';
-import { DatasetHistory, EquipmentData, ThresholdSettings } from './types';
+import { DatasetHistory, DatasetDashboard, EquipmentData, EquipmentSearchResult, ThresholdSettings } from './types';
 import { equipmentService } from './api';
 import { authService } from './services/auth-service';
 import Navbar from './components/Navbar';
@@ -14,12 +14,14 @@ import UploadSection from './components/UploadSection';
 import EquipmentTable from './components/EquipmentTable';
 import EquipmentCharts from './components/EquipmentCharts';
 import ThresholdPanel from './components/ThresholdPanel';
+import EquipmentSearch from './components/EquipmentSearch';
 import Login from './components/Login';
 
 const App: React.FC = () => {
   const [isAuthenticated, setIsAuthenticated] = useState<boolean>(authService.isAuthenticated());
   const [currentDataset, setCurrentDataset] = useState<DatasetHistory | null>(null);
   const [history, setHistory] = useState<DatasetHistory[]>([]);
+  const [dashboard, setDashboard] = useState<DatasetDashboard | null>(null);
   const [isLoading, setIsLoading] = useState<boolean>(false);
   const [isGeneratingPdf, setIsGeneratingPdf] = useState<boolean>(false);
   const [error, setError] = useState<string | null>(null);
@@ -31,6 +33,15 @@ const App: React.FC = () => {
 
   useEffect(() => {
     if (!isAuthenticated) return;
+    // Small pre-computed summary first, so the stat cards paint before history arrives
+    const loadDashboard = async () => {
+      try {
+        setDashboard(await equipmentService.getDashboard());
+      } catch (err) {
+        console.error("Failed to load dashboard", err);
+      }
+    };
+    loadDashboard();
     const loadHistory = async () => {
       try {
         const hist = await equipmentService.getHistory();
@@ -60,6 +71,18 @@ const App: React.FC = () => {
     }
   };
 
+  const handleSearchSelect = (result: EquipmentSearchResult) => {
+    // Open the newest loaded dataset holding the match
+    const dataset = result.dataset_ids
+      .map((id) => history.find((item) => item.id === id))
+      .find((item) => item !== undefined);
+    if (dataset) {
+      setCurrentDataset(dataset);
+    } else {
+      setError(`${result.equipment_name} is in ${result.filename}, which is not in recent uploads.`);
+    }
+  };
+
   const handleLogin = () => {
     setIsAuthenticated(true);
   };
@@ -115,6 +138,12 @@ const App: React.FC = () => {
           <section className="grid grid-cols-1 lg:grid-cols-3 gap-6">
             <div className="lg:col-span-1">
               <UploadSection onUpload={handleUpload} isLoading={isLoading} />
+              <div className="mt-4">
+                <EquipmentSearch
+                  types={(dashboard?.type_composition ?? []).map((entry) => entry.type)}
+                  onSelect={handleSearchSelect}
+                />
+              </div>
               {error && (
                 <div className="mt-4 p-4 bg-red-50 border border-red-200 text-red-700 rounded-lg text-sm">
                   {error}
@@ -125,7 +154,7 @@ const App: React.FC = () => {
             <div className="lg:col-span-2">
               <div className="grid grid-cols-1 md:grid-cols-4 gap-6">
                 <div className="md:col-span-3">
-                  <SummaryStats summary={currentDataset?.summary || null} />
+                  <SummaryStats summary={currentDataset?.summary || dashboard?.summary || null} />
                 </div>
                 <div className="md:col-span-1">
                   <ThresholdPanel settings={thresholds} onChange={setThresholds} />
@@ -147,7 +176,7 @@ const App: React.FC = () => {
                   <h3 className="text-lg font-semibold text-slate-800">Detailed Equipment Parameters</h3>
                   <span className="text-sm text-slate-500">Source: {currentDataset.filename}</span>
                 </div>
-                <EquipmentTable data={currentDataset.data} thresholds={thresholds} />
+                <EquipmentTable data={currentDataset.data} thresholds={thresholds} anomalies={currentDataset.anomalies} />
               </section>
             </>
           ) : (
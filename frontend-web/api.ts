@@ -7,7 +7,7 @@
 
 // Import the production service and legacy types to create a bridge
 import { equipmentService as modernService } from './services/equipment-service';
-import { DatasetHistory } from './types';
+import { DatasetHistory, DatasetDashboard, EquipmentSearchResult } from './types';
 
 // Bridge to modern service while maintaining legacy interface for root App.tsx
 export const equipmentService = {
@@ -25,6 +25,20 @@ export const equipmentService = {
     return await modernService.getHistory();
   },
 
+  /**
+   * Delegates dashboard summary fetching.
+   */
+  async getDashboard(datasetId?: string): Promise<DatasetDashboard | null> {
+    return await modernService.getDashboard(datasetId);
+  },
+
+  /**
+   * Delegates equipment name search.
+   */
+  async searchEquipment(query: string, types?: string[], signal?: AbortSignal): Promise<EquipmentSearchResult[]> {
+    return await modernService.searchEquipment(query, types, signal);
+  },
+
   /**
    * Delegates PDF generation to the modern service.
    */
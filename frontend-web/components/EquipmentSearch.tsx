@@ -0,0 +1,96 @@
+/**
+ * ARCHITECTURE: /frontend-web/components/
+ * Purpose: Typeahead search over equipment names across all retained datasets.
+ */
+
+import React, { useEffect, useState } from 'react';
+import { EquipmentSearchResult } from '../types';
+import { equipmentService } from '../api';
+
+const DEBOUNCE_MS = 150;
+
+interface EquipmentSearchProps {
+  /** Type filter options, e.g. from the dashboard's type_composition. */
+  types: string[];
+  onSelect: (result: EquipmentSearchResult) => void;
+}
+
+const EquipmentSearch: React.FC<EquipmentSearchProps> = ({ types, onSelect }) => {
+  const [query, setQuery] = useState<string>('');
+  const [type, setType] = useState<string>('');
+  const [results, setResults] = useState<EquipmentSearchResult[]>([]);
+
+  useEffect(() => {
+    const trimmed = query.trim();
+    if (!trimmed) {
+      setResults([]);
+      return;
+    }
+    // Debounce keystrokes and abort requests superseded by newer input
+    const controller = new AbortController();
+    const timer = setTimeout(async () => {
+      try {
+        setResults(await equipmentService.searchEquipment(trimmed, type ? [type] : [], controller.signal));
+      } catch (err: any) {
+        if (err.name !== 'AbortError') console.error("Search failed", err);
+      }
+    }, DEBOUNCE_MS);
+    return () => {
+      clearTimeout(timer);
+      controller.abort();
+    };
+  }, [query, type]);
+
+  const handleSelect = (result: EquipmentSearchResult) => {
+    setQuery(result.equipment_name);
+    setResults([]);
+    onSelect(result);
+  };
+
+  return (
+    <div className="relative bg-white p-5 rounded-2xl border border-slate-200 shadow-sm">
+      <h3 className="text-[10px] font-bold text-slate-400 uppercase tracking-widest mb-3">Find Equipment</h3>
+      <div className="flex gap-2">
+        <input
+          type="search"
+          value={query}
+          onChange={(e) => setQuery(e.target.value)}
+          placeholder="Name, e.g. P-101 or pump"
+          className="flex-grow px-3 py-2 bg-slate-50 border border-slate-200 rounded-lg text-sm focus:ring-2 focus:ring-blue-500 outline-none transition-all"
+        />
+        <select
+          value={type}
+          onChange={(e) => setType(e.target.value)}
+          className="px-2 py-2 bg-slate-50 border border-slate-200 rounded-lg text-sm outline-none"
+        >
+          <option value="">All types</option>
+          {types.map((t) => (
+            <option key={t} value={t}>{t}</option>
+          ))}
+        </select>
+      </div>
+
+      {results.length > 0 && (
+        <ul className="absolute left-5 right-5 mt-2 max-h-72 overflow-y-auto bg-white border border-slate-200 rounded-lg shadow-lg z-50">
+          {results.map((result) => (
+            <li key={`${result.dataset_id}:${result.index}`}>
+              <button
+                onClick={() => handleSelect(result)}
+                className="w-full px-3 py-2 text-left hover:bg-blue-50 flex justify-between items-center gap-2"
+              >
+                <span className="text-sm font-medium text-slate-800 truncate">{result.equipment_name}</span>
+                <span className="text-xs text-slate-500 flex-shrink-0">
+                  {result.type} · {result.filename}
+                  {result.dataset_ids.length > 1 && ` +${result.dataset_ids.length - 1}`}
+                  {result.match === 'fuzzy' && <span className="ml-1 text-amber-600">~</span>}
+                </span>
+              </button>
+            </li>
+          ))}
+        </ul>
+      )}
+    </div>
+  );
+};
+
+export default EquipmentSearch;
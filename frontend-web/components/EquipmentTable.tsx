@@ -1,14 +1,23 @@
 
-import React from 'react';
-import { EquipmentData, ThresholdSettings } from '../types';
+import React, { useMemo } from 'react';
+import { AnomalyRow, EquipmentData, ThresholdSettings } from '../types';
 
 interface EquipmentTableProps {
   data: EquipmentData[];
   thresholds?: ThresholdSettings;
+  anomalies?: AnomalyRow[];
 }
 
-const EquipmentTable: React.FC<EquipmentTableProps> = ({ data, thresholds }) => {
+const EquipmentTable: React.FC<EquipmentTableProps> = ({ data, thresholds, anomalies }) => {
   const isHigh = (val: number, max?: number) => max && val > max;
+  const anomalyByRow = useMemo(
+    () => new Map((anomalies || []).map(a => [a.index, a])),
+    [anomalies]
+  );
+  const isOutlier = (index: number, field: AnomalyRow['fields'][number]) =>
+    !!anomalyByRow.get(index)?.fields.includes(field);
+  const cellClass = (high: boolean | number | undefined, outlier: boolean, normal: string) =>
+    high ? 'text-red-600 font-bold' : outlier ? 'text-amber-600 font-semibold' : normal;
 
   return (
     <div className="overflow-x-auto">
@@ -24,10 +33,10 @@ const EquipmentTable: React.FC<EquipmentTableProps> = ({ data, thresholds }) =>
         </thead>
         <tbody className="divide-y divide-slate-100">
           {data.map((item, index) => (
-            <tr key={index} className={`hover:bg-slate-50 transition-colors ${
+            <tr key={index} title={anomalyByRow.has(index) ? `Anomaly score ${anomalyByRow.get(index)!.anomaly_score}` : undefined} className={`hover:bg-slate-50 transition-colors ${
               isHigh(item.flowrate, thresholds?.maxFlowrate) || 
               isHigh(item.pressure, thresholds?.maxPressure) || 
-              isHigh(item.temperature, thresholds?.maxTemperature) ? 'bg-red-50/30' : ''
+              isHigh(item.temperature, thresholds?.maxTemperature) ? 'bg-red-50/30' : anomalyByRow.has(index) ? 'bg-amber-50/40' : ''
             }`}>
               <td className="px-6 py-4 font-medium text-slate-800">{item.equipment_name}</td>
               <td className="px-6 py-4">
@@ -35,13 +44,13 @@ const EquipmentTable: React.FC<EquipmentTableProps> = ({ data, thresholds }) =>
                   {item.type}
                 </span>
               </td>
-              <td className={`px-6 py-4 text-right tabular-nums ${isHigh(item.flowrate, thresholds?.maxFlowrate) ? 'text-red-600 font-bold' : 'text-slate-600'}`}>
+              <td className={`px-6 py-4 text-right tabular-nums ${cellClass(isHigh(item.flowrate, thresholds?.maxFlowrate), isOutlier(index, 'flowrate'), 'text-slate-600')}`}>
                 {item.flowrate.toFixed(2)}
               </td>
-              <td className={`px-6 py-4 text-right tabular-nums ${isHigh(item.pressure, thresholds?.maxPressure) ? 'text-red-600 font-bold' : 'text-slate-600'}`}>
+              <td className={`px-6 py-4 text-right tabular-nums ${cellClass(isHigh(item.pressure, thresholds?.maxPressure), isOutlier(index, 'pressure'), 'text-slate-600')}`}>
                 {item.pressure.toFixed(2)}
               </td>
-              <td className={`px-6 py-4 text-right tabular-nums ${isHigh(item.temperature, thresholds?.maxTemperature) ? 'text-red-600 font-bold font-semibold' : 'text-blue-600'}`}>
+              <td className={`px-6 py-4 text-right tabular-nums ${cellClass(isHigh(item.temperature, thresholds?.maxTemperature), isOutlier(index, 'temperature'), 'text-blue-600')}`}>
                 {item.temperature.toFixed(1)}
               </td>
             </tr>
@@ -1,5 +1,5 @@
 
-import { EquipmentData, EquipmentSummary, DatasetHistory } from '../types';
+import { EquipmentData, EquipmentSummary, DatasetHistory, DatasetDashboard, EquipmentSearchResult } from '../types';
 import { authService } from './auth-service';
 
 const API_BASE = (import.meta as any).env?.VITE_API_BASE || 'http://localhost:8000/api';
@@ -63,6 +63,41 @@ export const equipmentService = {
     document.body.removeChild(a);
   },
 
+  /**
+   * Fetches the pre-computed dashboard summary for a dataset ('latest' by default).
+   * Returns null when no dataset exists yet.
+   */
+  async getDashboard(datasetId: string = 'latest'): Promise<DatasetDashboard | null> {
+    const response = await fetch(`${API_BASE}/datasets/${datasetId}/dashboard/`, {
+      headers: {
+        ...authService.getAuthHeader(),
+      },
+    });
+
+    if (!response.ok) return null;
+
+    return await response.json();
+  },
+
+  /**
+   * Typeahead search over equipment names across retained datasets.
+   * Pass an AbortSignal to cancel a request superseded by newer input.
+   */
+  async searchEquipment(query: string, types: string[] = [], signal?: AbortSignal): Promise<EquipmentSearchResult[]> {
+    const params = new URLSearchParams({ q: query });
+    if (types.length) params.set('type', types.join(','));
+    const response = await fetch(`${API_BASE}/search/?${params}`, {
+      headers: {
+        ...authService.getAuthHeader(),
+      },
+      signal,
+    });
+
+    if (!response.ok) return [];
+
+    return (await response.json()).results;
+  },
+
   /**
    * Fetches dataset history from the backend.
    */
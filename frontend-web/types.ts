@@ -24,6 +24,30 @@ export interface EquipmentSummary {
   avg_pressure: number;
   avg_temperature: number;
   type_distribution: Record<string, number>;
+  anomaly_count?: number;
+}
+
+/** Row flagged by the backend's per-type outlier scoring (robust z-score / IQR fences). */
+export interface AnomalyRow {
+  index: number;
+  equipment_name: string;
+  anomaly_score: number;
+  anomaly_flags: number;
+  fields: ('flowrate' | 'pressure' | 'temperature')[];
+}
+
+export interface DashboardSummary extends EquipmentSummary {
+  total_flowrate: number;
+}
+
+export interface DatasetDashboard {
+  id: string;
+  filename: string;
+  timestamp: string;
+  revision: number;
+  summary: DashboardSummary;
+  type_composition: { type: string; count: number; share: number }[];
+  percentiles: Record<string, { p50: number | null; p90: number | null; p99: number | null }>;
 }
 
 export interface DatasetHistory {
@@ -32,6 +56,21 @@ export interface DatasetHistory {
   timestamp: string;
   summary: EquipmentSummary;
   data: EquipmentData[];
+  anomalies?: AnomalyRow[];
+}
+
+/** Equipment name match from /api/search/, across all retained datasets. */
+export interface EquipmentSearchResult {
+  equipment_name: string;
+  type: string;
+  index: number;
+  /** Newest dataset holding the unit; dataset_ids lists every one, newest first. */
+  dataset_id: string;
+  dataset_ids: string[];
+  filename: string;
+  timestamp: string;
+  match: 'exact' | 'prefix' | 'word' | 'fuzzy';
+  score: number;
 }
 
 export enum ParameterType {